@@ -5,7 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 from src.core.database import Base
-from src.apps.books.models import Author, Book, BookPublisher, BookCategory
+from src.apps.books.models import Author, Book, BookPublisher, BookCategory, BookCategoryClosure
+from src.apps.books.models import AuthorStats, CategoryStats, PublisherStats, YearStats, CatalogChange
 from src.apps.auth.models import user_roles, role_permissions, User, Role, Permission
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
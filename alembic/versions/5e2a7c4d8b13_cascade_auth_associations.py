@@ -0,0 +1,43 @@
+"""cascade auth associations
+
+Revision ID: 5e2a7c4d8b13
+Revises: c81f5e3b9a42
+Create Date: 2026-10-18 19:12:40.218553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a7c4d8b13'
+down_revision: Union[str, None] = 'c81f5e3b9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, referred table) of the association foreign keys, named as Postgres named them
+FOREIGN_KEYS = [
+    ('auth_user_roles', 'user_id', 'auth_users'),
+    ('auth_user_roles', 'role_id', 'auth_roles'),
+    ('auth_role_permissions', 'role_id', 'auth_roles'),
+    ('auth_role_permissions', 'permission_id', 'auth_permissions'),
+]
+
+
+def upgrade() -> None:
+    # users, roles and permissions are deleted with one DELETE ... RETURNING,
+    # their association rows go with them in the database
+    for table, column, referred in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    for table, column, referred in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'])
@@ -0,0 +1,52 @@
+"""notify catalog changes
+
+Revision ID: c81f5e3b9a42
+Revises: 9d4e2b7a5c10
+Create Date: 2026-10-18 18:03:17.640291
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5e3b9a42'
+down_revision: Union[str, None] = '9d4e2b7a5c10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+RECORD_CATALOG_CHANGE = """
+    CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO catalog_changes (txid, table_name, row_id, op)
+            SELECT pg_current_xact_id()::text::bigint, TG_TABLE_NAME, id, 'delete' FROM old_rows
+            ON CONFLICT (table_name, row_id) DO UPDATE
+            SET seq = EXCLUDED.seq, txid = EXCLUDED.txid, op = EXCLUDED.op, changed_at = EXCLUDED.changed_at;
+        ELSE
+            INSERT INTO catalog_changes (txid, table_name, row_id, op)
+            SELECT pg_current_xact_id()::text::bigint, TG_TABLE_NAME, id, 'upsert' FROM new_rows
+            ON CONFLICT (table_name, row_id) DO UPDATE
+            SET seq = EXCLUDED.seq, txid = EXCLUDED.txid, op = EXCLUDED.op, changed_at = EXCLUDED.changed_at;
+        END IF;
+        {notify}
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # delivered on commit, and identical notifications of one transaction are sent once,
+    # so a bulk import wakes the listeners once per table; the payload is only a hint,
+    # listeners read the changes from catalog_changes
+    op.execute(RECORD_CATALOG_CHANGE.format(notify="PERFORM pg_notify('catalog_changes', TG_TABLE_NAME);"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(RECORD_CATALOG_CHANGE.format(notify=""))
@@ -1,7 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.v1.routers import register_routes
+from src.apps.books.services import catalog_stats, category_tree_cache
+from src.apps.books.services.change_stream import change_hub
+from src.apps.auth.services.passwords import password_hasher
 # from library.db.session import engine
 # from library.db.models import author, book
 
@@ -23,6 +27,19 @@ tags_metadata = [
     # },
 ]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    category_tree_cache.start()
+    catalog_stats.start()
+    change_hub.start()
+    password_hasher.start()
+    yield
+    await password_hasher.stop()
+    await change_hub.stop()
+    await catalog_stats.stop()
+    await category_tree_cache.stop()
+
+
 app = FastAPI(
     title="Books API", 
     description="This is a simple book taking service", 
@@ -35,7 +52,8 @@ app = FastAPI(
         "name": "MIT"    
     },
     docs_url="/",
-    openapi_tags=tags_metadata
+    openapi_tags=tags_metadata,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -1,38 +1,96 @@
+import hashlib
+import time
 from typing import Annotated
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 # from jwt import PyJWTError
 # import jwt
 import logging
-from jose import jwt, JWTError
+from jose import JWTError
+from pydantic import ValidationError
 from src.core.config import settings
 from src.apps.auth.schemas import TokenData
-from src.apps.auth.exceptions import AuthenticationError
+from src.apps.auth.exceptions import AuthenticationError, PermissionDeniedError
+from src.apps.auth.services.signing_keys import signing_keys
+from src.apps.auth.services.token_denylist import token_denylist
+from src.utilities.cache import TTLCache
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
 class AuthHandler:
-    def get_current_user(self, token: Annotated[str, Depends(oauth2_bearer)]) -> TokenData:
-        return self.__verify_token(token)
+    """Verifies bearer access tokens
 
+    A token verified once is kept in a per-worker LRU cache, keyed by its
+    SHA-256 digest (the token itself is never stored) and expiring with the
+    token's own exp, so a repeat request costs a hash and a dict lookup instead
+    of a signature check. The cache only stands in for decoding: the jti of
+    every token, cached or not, is checked against the revocation denylist on
+    every request. forget() drops a token from this worker's cache right away.
+    """
+    def __init__(self, maxsize: int):
+        self.cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def get_current_user(self, token: Annotated[str, Depends(oauth2_bearer)]) -> TokenData:
+        key = self.__digest(token)
+        token_data = self.cache.get(key)
+        if token_data is None:
+            token_data = self.__verify_token(token)
+            ttl = token_data.exp - time.time() if token_data.exp is not None else 0
+            if ttl > 0:
+                self.cache.set(key, token_data, ttl)
+        if token_data.jti is not None and await token_denylist.is_revoked(token_data.jti):
+            logging.warning(f"Rejected revoked token {token_data.jti}")
+            raise AuthenticationError()
+        return token_data
+
+    def forget(self, token: str):
+        self.cache.pop(self.__digest(token))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+        }
+
+    @staticmethod
+    def __digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @staticmethod
     def __verify_token(token: str) -> TokenData:
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            user_id: str = payload.get('id')
-            return TokenData(user_id=user_id)
-        except JWTError as e:
+            payload = signing_keys.decode(token)
+            if payload.get("type") != "access":
+                raise JWTError("not an access token")
+            return TokenData(**payload)
+        except (JWTError, ValidationError) as e:
             logging.warning(f"Token verification failed: {str(e)}")
             raise AuthenticationError()
     
     
-authHandler = AuthHandler()
+authHandler = AuthHandler(settings.TOKEN_CACHE_SIZE)
 CurrentUser = Annotated[TokenData, Depends(authHandler.get_current_user)]
 
+
+def require_permission(permission: str):
+    """Dependency returning the current user when their access token carries permission, else 403"""
+    async def check_permission(current_user: CurrentUser) -> TokenData:
+        if permission not in (current_user.permissions or []):
+            logging.warning(f"User {current_user.sub} lacks permission '{permission}'")
+            raise PermissionDeniedError(permission)
+        return current_user
+    return check_permission
+
+
+AdminUser = Annotated[TokenData, Depends(require_permission(settings.ADMIN_PERMISSION))]
+
 # async def get_current_user( token: str = Depends(oauth2_bearer)):
 #     credentials_exception = HTTPException(
 #         status_code=status.HTTP_401_UNAUTHORIZED,
 #         detail="Could not validate credentials",
 #         headers={"WWW-Authenticate": "Bearer"},
 #     )
-#     return __verify_token(token, credentials_exception)
\ No newline at end of file
+#     return __verify_token(token, credentials_exception)
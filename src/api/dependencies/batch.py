@@ -0,0 +1,8 @@
+from typing import Annotated, List, Optional
+from uuid import UUID
+from fastapi import Depends
+
+from src.utilities.batch import batch_ids
+
+
+BatchIds = Annotated[Optional[List[UUID]], Depends(batch_ids)]
@@ -0,0 +1,16 @@
+from typing import Annotated, Tuple
+from fastapi import Depends
+
+from src.apps.auth.models import User
+from src.apps.auth.schemas import UserModel
+from src.apps.books.models import Author, Book
+from src.apps.books.schemas.author import AuthorModel
+from src.apps.books.schemas import BOOK_INCLUDES, BookModel
+from src.utilities.fieldsets import FieldSet, fieldset, inclusions
+
+
+BookFields = Annotated[FieldSet, Depends(fieldset(BookModel, Book))]
+AuthorFields = Annotated[FieldSet, Depends(fieldset(AuthorModel, Author))]
+UserFields = Annotated[FieldSet, Depends(fieldset(UserModel, User))]
+
+BookIncludes = Annotated[Tuple[str, ...], Depends(inclusions(BOOK_INCLUDES))]
@@ -0,0 +1,8 @@
+from typing import Annotated
+from fastapi import Depends
+
+from src.apps.books.filters import BookFilters, PopularityFilters
+
+
+BookFilter = Annotated[BookFilters, Depends()]
+PopularityFilter = Annotated[PopularityFilters, Depends()]
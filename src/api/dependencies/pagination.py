@@ -0,0 +1,7 @@
+from typing import Annotated
+from fastapi import Depends
+
+from src.utilities.pagination import PageParams
+
+
+Pagination = Annotated[PageParams, Depends()]
@@ -1,12 +1,14 @@
 import logging
-from sqlite3 import IntegrityError
 from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-# from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError
 
 from ..models import Permission
 from src.apps.books.exceptions import ObjectCreationError, ObjectVerificationError, ObjectNotFoundError
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import delete_by_id, update_by_id
 
 
 class PermissionCRUDs:
@@ -39,16 +41,15 @@ class PermissionCRUDs:
             raise ObjectCreationError(str(e))
 
     
-    async def get_all(self, db: AsyncSession):
+    async def get_all(self, db: AsyncSession, page: PageParams):
         """
-        Get all Permissions objects from db
+        Get a page of Permissions objects from db, ordered by (name, id)
         """
-        statement = select(Permission).order_by(Permission.id)
-        result = await db.execute(statement)
-        permissions = result.scalars().all()
+        statement = select(Permission)
+        page = await paginate(db, statement, page, Permission.name, Permission.id)
         
-        logging.info(f"Retrieved {len(permissions)} permissions.")
-        return permissions
+        logging.info(f"Retrieved {len(page.items)} permissions.")
+        return page
 
 
     async def get_by_id(
@@ -58,10 +59,7 @@ class PermissionCRUDs:
         Get permission by id
         """
         async with async_session as db:
-            statement = select(Permission).filter(Permission.id == permission_id)
-            
-            result = await db.execute(statement)
-            permission = result.scalars().one_or_none()
+            permission = await get_loader(db, Permission).load(permission_id)
             
             if not permission:
                 logging.warning(f"Permission {permission_id} not found.")
@@ -75,35 +73,30 @@ class PermissionCRUDs:
         self, db: AsyncSession, permission_id, data
     ):
         """
-        Update Permission by id
+        Update Permission by id, only the given fields
         """
-        statement = select(Permission).filter(Permission.id == permission_id)
-
-        result = await db.execute(statement)
-        permission = result.scalars().one_or_none()
-
-        if not permission:
-            logging.warning(f"Permission {permission_id} not found.")
-            raise ObjectNotFoundError(permission_id)
-
-        permission.name = data["name"]
-        permission.code = data["code"]
-
-        await db.commit()
-        await db.refresh(permission)
+        try:
+            permission = await update_by_id(db, Permission, permission_id, data)
+            if not permission:
+                logging.warning(f"Permission {permission_id} not found.")
+                raise ObjectNotFoundError("Permission", permission_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update permission {permission_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Permission", str(e))
 
         logging.info(f"Successfully updated permission {permission_id}.")
         return permission
 
 
-    async def delete(self, db: AsyncSession, permission: Permission):
-        """delete permission by id
+    async def delete(self, db: AsyncSession, permission_id):
+        """delete permission by id, its role links go with it (ON DELETE CASCADE)
         """
-        await db.delete(permission)
+        deleted = await delete_by_id(db, Permission, permission_id)
+        if not deleted:
+            logging.warning(f"Permission {permission_id} not found.")
+            raise ObjectNotFoundError("Permission", permission_id)
         await db.commit()
-        await db.refresh(permission)
 
-        logging.info(f"Successfully deleted permission {permission.id}.")
-        return {}
-    
-     
\ No newline at end of file
+        logging.info(f"Successfully deleted permission {permission_id}.")
@@ -8,6 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models import Role, Permission
 from src.apps.auth.schemas.role import RoleModel
 from src.apps.books.exceptions import ObjectCreationError, ObjectVerificationError, ObjectNotFoundError
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import delete_by_id, update_by_id
 # from sqlalchemy.exc import IntegrityError
 
 
@@ -20,53 +23,20 @@ class RoleCRUDs:
         Create role object
         """
         try:
-            db.add(role)
-            await db.flush()        
-            
             if permission_ids:
-                permissions_result = await db.execute(
-                    select(Permission).where(Permission.id.in_(permission_ids))
-                )
-                permissions = permissions_result.scalars().all()
-                # Now reload the role from the session to ensure it's attached
-                statement = select(Role).where(Role.id == role.id)
-
-                result = await db.execute(statement)
-                attached_role = result.scalars().first()
-                attached_role.permissions = permissions
-
-                # Use attached_role for further operations
-                await db.commit()
-                await db.refresh(attached_role)
-
-                # Eagerly load permissions
-                statement = (
-                    select(Role)
-                    .options(selectinload(Role.permissions))
-                    .where(Role.id == attached_role.id)
-                )
-
-                result = await db.execute(statement)
-                role_with_permissions = result.scalars().first()
-            else:
-
-                await db.commit()
-                await db.refresh(role)
-                # Eagerly load permissions
-                statement = (
-                    select(Role)
-                    .options(selectinload(Role.permissions))
-                    .where(Role.id == role.id)
-                )
+                # one batched lookup; unknown permission ids are skipped
+                permissions = await get_loader(db, Permission).load_many(permission_ids)
+                role.permissions = [permission for permission in permissions if permission is not None]
 
-                result = await db.execute(statement)
-                role_with_permissions = result.scalars().first()
+            db.add(role)
+            await db.commit()
+            get_loader(db, Role).prime(role)
 
             # Force loading all permission fields (no lazy loading later)
-            _ = [p.id for p in role_with_permissions.permissions]
+            _ = [p.id for p in role.permissions]
         
             logging.info(f"Created new role.")
-            # return RoleModel.model_validate(role_with_permissions)
+            # return RoleModel.model_validate(role)
             permissions_data = [
                 # PermissionModel.model_validate(p) 
                 {
@@ -74,14 +44,14 @@ class RoleCRUDs:
                     "name": p.name,
                     "description": p.description
                 }
-                for p in role_with_permissions.permissions
+                for p in role.permissions
                 # PermissionModel(id=p.id, name=p.name, description=p.description)
-                # for p in role_with_permissions.permissions
+                # for p in role.permissions
             ]
 
             role_data = {
-                "id": str(role_with_permissions.id),
-                "name": role_with_permissions.name,
+                "id": str(role.id),
+                "name": role.name,
                 "permissions": permissions_data
             }
             return RoleModel(**role_data)
@@ -100,88 +70,15 @@ class RoleCRUDs:
             raise ObjectCreationError(str(e))
         
         
-    async def add1(self, db: AsyncSession, role: Role, permission_ids=None):
+    async def get_all(self, db: AsyncSession, page: PageParams):
         """
-        Create role object
+        Get a page of Roles objects from db, ordered by (name, id)
         """
-        try:
-            db.add(role)
-            await db.flush()
-            
-            if permission_ids:
-                print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@ 1")
-                permissions_result = await db.execute(
-                    select(Permission).where(Permission.id.in_(permission_ids))
-                )
-                print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@ 1 1")
-                permissions = permissions_result.scalars().all()
-                print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@ 1 2")
-                
-                # Now reload the role from the session to ensure it's attached
-                statement = select(Role).where(Role.id == role.id)
-                result = await db.execute(statement)
-                attached_role = result.scalars().first()
-                attached_role.permissions = permissions
-                attached_role.permissions = permissions  # assign the fully loaded list here
-                print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@ 2")
-
-            await db.commit()
-
-            await db.refresh(role)
-            
-            # Eagerly load permissions to avoid lazy loading outside session
-            statement = (
-                select(Role).
-                options(selectinload(Role.permissions)).
-                where(Role.id == attached_role.id)
-            )
-            result = await db.execute(statement)
-            role_with_permissions = result.scalars().first()
-                        
-            # Force loading all permission fields (no lazy loading later)
-            _ = [p.id for p in role_with_permissions.permissions]
+        statement = select(Role)
+        page = await paginate(db, statement, page, Role.name, Role.id)
         
-            logging.info(f"Created new role.")
-            # return RoleModel.model_validate(role_with_permissions)
-            permissions_data = [
-                # PermissionModel.model_validate(p) 
-                {
-                    "id": str(p.id),
-                    "name": p.name,
-                    "description": p.description
-                }
-                for p in role_with_permissions.permissions
-                # PermissionModel(id=p.id, name=p.name, description=p.description)
-                # for p in role_with_permissions.permissions
-            ]
-
-            role_data = {
-                "id": str(role_with_permissions.id),
-                "name": role_with_permissions.name,
-                "permissions": permissions_data
-            }
-            return RoleModel(**role_data)
-
-        except ValidationError as e:
-            logging.error(f"Failed to the role data verification. Error: {str(e)}")
-            await db.rollback()
-            raise ObjectVerificationError(str(e))
-        except Exception as e:
-            logging.error(f"Failed to create role. Error: {str(e)}")
-            await db.rollback()
-            raise ObjectCreationError(str(e))
-    
-    
-    async def get_all(self, db: AsyncSession):
-        """
-        Get all Roles objects from db
-        """
-        statement = select(Role).order_by(Role.id)
-        result = await db.execute(statement)
-        roles = result.scalars().all()
-        
-        logging.info(f"Retrieved {len(roles)} roles.")
-        return roles
+        logging.info(f"Retrieved {len(page.items)} roles.")
+        return page
 
 
     async def get_by_id(
@@ -191,10 +88,7 @@ class RoleCRUDs:
         Get role by id
         """
         async with async_session as db:
-            statement = select(Role).filter(Role.id == role_id)
-            
-            result = await db.execute(statement)
-            role = result.scalars().one_or_none()
+            role = await get_loader(db, Role).load(role_id)
             
             if not role:
                 logging.warning(f"Role {role_id} not found.")
@@ -211,9 +105,7 @@ class RoleCRUDs:
         Get permission by id
         """
         # First check if the role exists
-        role_stmt = select(Role).filter(Role.id == role_id)
-        role_result = await db.execute(role_stmt)
-        role = role_result.scalar_one_or_none()
+        role = await get_loader(db, Role).load(role_id)
 
         if not role:
             logging.warning(f"Permission with id {role_id} not found.")
@@ -234,61 +126,36 @@ class RoleCRUDs:
         self, db: AsyncSession, role_id, data, permission_ids=None
     ):
         """
-        Update Role by id
+        Update Role by id, only the given fields; permission_ids (when not None)
+        replaces the role's permissions
         """
-        statement = select(Role).filter(Role.id == role_id)
-
-        result = await db.execute(statement)
-        role = result.scalars().one_or_none()
-
-        if not role:
-            logging.warning(f"Role {role_id} not found.")
-            raise ObjectNotFoundError(role_id)
-
-        if hasattr(data, "dict"):
-            data = data.dict(exclude_unset=True)
-            
-        # Update role fields
-        if "name" in data and data["name"] is not None:
-            role.name = data["name"]
-            name = data["name"]
-            print(f"@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@ Name: {name}")
-            
-        if "description" in data and data["name"] is not None:
-            role.description = data["description"]
-            
-        # Update permissions if provided
-        if permission_ids:
-            permissions_result = await db.execute(
-                select(Permission).where(Permission.id.in_(permission_ids))
-            )
-            permissions = permissions_result.scalars().all()
-            role.permissions = permissions
-
-        await db.commit()
-        await db.refresh(role)
+        try:
+            role = await update_by_id(db, Role, role_id, data)
+            if not role:
+                logging.warning(f"Role {role_id} not found.")
+                raise ObjectNotFoundError("Role", role_id)
 
-        # Eagerly load permissions
-        statement = (
-            select(Role)
-            .options(selectinload(Role.permissions))
-            .where(Role.id == role.id)
-        )
-        result = await db.execute(statement)
-        role_with_permissions = result.scalars().first()
+            if permission_ids is not None:
+                # one batched lookup; unknown permission ids are skipped
+                permissions = await get_loader(db, Permission).load_many(permission_ids)
+                role.permissions = [permission for permission in permissions if permission is not None]
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update role {role_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Role", str(e))
 
         logging.info(f"Successfully updated role {role_id}.")
-        return role_with_permissions
+        return role
 
 
-    async def delete(self, db: AsyncSession, role: Role):
-        """delete role by id
+    async def delete(self, db: AsyncSession, role_id):
+        """delete role by id, its user and permission links go with it (ON DELETE CASCADE)
         """
-        await db.delete(role)
+        deleted = await delete_by_id(db, Role, role_id)
+        if not deleted:
+            logging.warning(f"Role {role_id} not found.")
+            raise ObjectNotFoundError("Role", role_id)
         await db.commit()
-        await db.refresh(role)
 
-        logging.info(f"Successfully deleted role {role.id}.")
-        return {}
-    
-  
\ No newline at end of file
+        logging.info(f"Successfully deleted role {role_id}.")
@@ -1,91 +1,57 @@
 import logging
-from passlib.context import CryptContext
+from typing import Optional, Sequence
+from uuid import UUID
 from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.apps.auth.schemas.role import RoleModel
 from src.apps.auth.schemas.user import UserCreateModel, UserModel
 from src.apps.auth.services.auth import AuthServices
+from src.apps.auth.services.passwords import password_hasher
 from ..models import User, Role
 from src.apps.books.exceptions import ObjectCreationError, ObjectVerificationError, ObjectNotFoundError
+from src.utilities.batch import Batch, get_batch
+from src.utilities.dataloader import get_loader
+from src.utilities.fieldsets import select_fields
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import delete_by_id, update_by_id
 
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class UserCRUDs:
     """ ================== """
     """ Users API Services """
     """ ================== """ 
-    def __get_password_hash(self, password: str) -> str:
-        return bcrypt_context.hash(password)
-
-
     async def add(self, db: AsyncSession, user_data: UserCreateModel):
         """
         Create role object
         """
+        password_hash = await password_hasher.hash(user_data.password)
         try:
             user = User(
                 username=user_data.username, 
                 first_name=user_data.first_name, 
                 last_name=user_data.last_name, 
-                password_hash=self.__get_password_hash(user_data.password)
+                password_hash=password_hash
             )
             
             role_ids=user_data.role_ids
             
-            db.add(user)
-            # await db.flush()        
-            
             if role_ids:
-                roles_result = await db.execute(
-                    select(Role).where(Role.id.in_(role_ids))
-                )
-                roles = roles_result.scalars().all()
-                # Now reload the role from the session to ensure it's attached
-                statement = select(User).where(User.id == user.id)
-
-                result = await db.execute(statement)
-                attached_user = result.scalars().first()
-                attached_user.roles = roles
-
-                # Use attached_role for further operations
-                await db.commit()
-                await db.refresh(attached_user)
-
-                # Eagerly load roles
-                statement = (
-                    select(User)
-                    .options(selectinload(User.roles))
-                    .where(User.id == attached_user.id)
-                )
+                # one batched lookup; unknown role ids are skipped
+                roles = await get_loader(db, Role).load_many(role_ids)
+                user.roles = [role for role in roles if role is not None]
 
-                result = await db.execute(statement)
-                user_with_roles = result.scalars().first()
-            else:
-
-                await db.commit()
-                await db.refresh(user)
-                # Eagerly load roles
-                statement = (
-                    select(User)
-                    .options(selectinload(User.roles))
-                    .where(User.id == user.id)
-                )
-
-                result = await db.execute(statement)
-                user_with_roles = result.scalars().first()
+            db.add(user)
+            await db.commit()
+            get_loader(db, User).prime(user)
 
             # Force loading all role fields (no lazy loading later)
-            _ = [p.id for p in user_with_roles.roles]
+            _ = [p.id for p in user.roles]
         
             logging.info(f"Created new user.")
-            
-            for p in user_with_roles.roles:
-                print(f"Role: id={p.id}, name={p.name}, description={p.description}")
                 
             # return RoleModel.model_validate(role_with_roles)
             # roles_data = [
@@ -95,7 +61,7 @@ class UserCRUDs:
             #         "name": p.name,
             #         "description": p.description
             #     }
-            #     for p in user_with_roles.roles
+            #     for p in user.roles
             #     # PermissionModel(id=p.id, name=p.name, description=p.description)
             #     # for p in role_with_roles.roles
             # ]
@@ -105,14 +71,14 @@ class UserCRUDs:
                     name=p.name,
                     description=p.description
                 )
-                for p in user_with_roles.roles
+                for p in user.roles
             ]
             user_data = {
-                "id": str(user_with_roles.id),
-                "first_name": user_with_roles.first_name,
-                "last_name": user_with_roles.last_name,
-                "username": user_with_roles.username,
-                # "password_hash": user_with_roles.password_hash,
+                "id": str(user.id),
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "username": user.username,
+                # "password_hash": user.password_hash,
                 "roles": roles_data
             }
             return UserModel(**user_data)
@@ -155,34 +121,44 @@ class UserCRUDs:
             raise ObjectCreationError(str(e))        
 
 
-    async def get_all(self, db: AsyncSession):
+    async def get_all(self, db: AsyncSession, page: PageParams, fields: Optional[Sequence[str]] = None):
         """
-        Get all users objects from db
+        Get a page of users objects from db, ordered by (username, id)
+        Only the given columns are selected when fields is set
         """
-        statement = select(User).order_by(User.id)
-
-        result = await db.execute(statement)
-        users = result.scalars().all()
+        statement = select_fields(User, fields, User.username, User.id)
+        if not fields:
+            statement = statement.options(selectinload(User.roles))
+        page = await paginate(db, statement, page, User.username, User.id)
         
-        logging.info(f"Retrieved {len(users)} users.")
-        return users
+        logging.info(f"Retrieved {len(page.items)} users.")
+        return page
+
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[UUID], fields: Optional[Sequence[str]] = None) -> Batch:
+        """
+        Get users by a list of ids in one query, in the order of ids, with the ids not found
+        """
+        return await get_batch(db, User, ids, fields)
 
 
     async def get_by_id(
-        self, db: AsyncSession, user_id: int
+        self, db: AsyncSession, user_id: UUID, fields: Optional[Sequence[str]] = None
     ):
         """
-        Get user by id
+        Get user by id, only the given columns when fields is set
         """
-        try:
-            statement = select(User).filter(User.id == user_id)
-            result = await db.execute(statement)           
-            user = result.scalars().one()
-            logging.info(f"Retrieved user {user_id}.")
-            return user
-        except NoResultFound:
+        if fields:
+            result = await db.execute(select_fields(User, fields).filter(User.id == user_id))
+            user = result.one_or_none()
+        else:
+            user = await get_loader(db, User).load(user_id)
+
+        if user is None:
             logging.warning(f"User with id {user_id} not found.")
-            raise ObjectNotFoundError(user_id)
+            raise ObjectNotFoundError("User", user_id)
+        logging.info(f"Retrieved user {user_id}.")
+        return user
             
         
     async def get_roles_by_user_id(
@@ -192,9 +168,7 @@ class UserCRUDs:
         Get user by id
         """
         # First check if the user exists
-        user_stmt = select(User).filter(User.id == user_id)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalar_one_or_none()
+        user = await get_loader(db, User).load(user_id)
 
         if not user:
             logging.warning(f"User with id {user_id} not found.")
@@ -240,34 +214,30 @@ class UserCRUDs:
         self, db: AsyncSession, user_id, data
     ):
         """
-        Update User by id
+        Update User by id, only the given fields
         """
-        statement = select(User).filter(User.id == user_id)
-
-        result = await db.execute(statement)
-        user = result.scalars().scalar_one_or_none()
-
-        if not user:
-            logging.warning(f"User {user_id} not found.")
-            raise ObjectNotFoundError(user_id)
-        
-        user.name = data["name"]
-        user.username = data["username"]
-
-        await db.commit()
-        await db.refresh(user)
+        try:
+            user = await update_by_id(db, User, user_id, data)
+            if not user:
+                logging.warning(f"User {user_id} not found.")
+                raise ObjectNotFoundError("User", user_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update user {user_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("User", str(e))
 
         logging.info(f"Successfully updated user {user_id}.")
         return user
 
 
-    async def delete(self, db: AsyncSession, user: User):
-        """delete user by id
+    async def delete(self, db: AsyncSession, user_id):
+        """delete user by id, its role links go with it (ON DELETE CASCADE)
         """
-        await db.delete(user)
+        deleted = await delete_by_id(db, User, user_id)
+        if not deleted:
+            logging.warning(f"User {user_id} not found.")
+            raise ObjectNotFoundError("User", user_id)
         await db.commit()
-        await db.refresh(user)
 
-        logging.info(f"Successfully deleted user {user.id}.")
-        return {}
-       
\ No newline at end of file
+        logging.info(f"Successfully deleted user {user_id}.")
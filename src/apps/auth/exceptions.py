@@ -76,11 +76,24 @@ class InvalidPasswordError(UserError):
     def __init__(self):
         super().__init__(status_code=401, detail="Current password is incorrect")
 
+class PasswordHasherBusyError(HTTPException):
+    def __init__(self, message: str = "Too many password checks in progress, try again shortly"):
+        super().__init__(status_code=503, detail=message, headers={"Retry-After": "1"})
+
+class TooManyLoginAttemptsError(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(status_code=429, detail="Too many failed login attempts, try again later", headers={"Retry-After": str(retry_after)})
+
 class AuthenticationError(HTTPException):
     def __init__(self, message: str = "Could not validate user"):
         super().__init__(status_code=401, detail=message)
 
 
+class PermissionDeniedError(HTTPException):
+    def __init__(self, permission: str):
+        super().__init__(status_code=403, detail=f"Permission '{permission}' required")
+
+
 class RefreshTokenMissingError(HTTPException):
     def __init__(self, message: str = "Refresh token missing"):
         super().__init__(status_code=401, detail=message)
@@ -1,12 +1,16 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.orm import relationship
 from src.core.database import Base  
+from src.common.mixins import Timestamp
 from .associations import role_permissions
 
-class Permission(Base):
+class Permission(Timestamp, Base):
     __tablename__ = 'auth_permissions'
+    __table_args__ = (
+        Index('ix_auth_permissions_name_id', 'name', 'id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True)
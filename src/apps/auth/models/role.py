@@ -1,13 +1,17 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.orm import relationship
 from src.core.database import Base  
+from src.common.mixins import Timestamp
 from .associations import user_roles
 from .associations import role_permissions
 
-class Role(Base):
+class Role(Timestamp, Base):
     __tablename__ = 'auth_roles'
+    __table_args__ = (
+        Index('ix_auth_roles_name_id', 'name', 'id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, unique=True, nullable=False)
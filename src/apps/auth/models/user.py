@@ -1,12 +1,16 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, String
 from sqlalchemy.orm import relationship
 from src.core.database import Base  
+from src.common.mixins import Timestamp
 from .associations import user_roles
 
-class User(Base):
+class User(Timestamp, Base):
     __tablename__ = 'auth_users'
+    __table_args__ = (
+        Index('ix_auth_users_username_id', 'username', 'id'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String, unique=True, nullable=False)
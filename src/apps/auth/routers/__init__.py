@@ -2,3 +2,4 @@ from .auth import routers as auth_routers
 from .user import routers as user_routers
 from .role import routers as role_routers
 from .permission import routers as permission_routers
+from .jwks import routers as jwks_routers
@@ -3,10 +3,11 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette import status
 
-from src.api.dependencies.auth import CurrentUser
+from src.api.dependencies.auth import AdminUser, CurrentUser, authHandler
 from ..schemas import Token, LoginResponse, \
-    UserResponse, RegisterUserRequest, PasswordChange
+    UserResponse, RegisterUserRequest, PasswordChange, PasswordHashingStats, TokenCacheStats
 from ..services.auth import AuthServices
+from ..services.passwords import password_hasher
 from src.api.dependencies.database import AsyncDbSession
 from src.utilities.rate_limiter import limiter
 
@@ -54,23 +55,39 @@ async def refresh_token_ex(request: Request, db: AsyncDbSession):
 @routers.post("/logout")
 async def logout(request: Request):
     token = request.cookies.get("refresh_token")
-    return auth_services.logout(token)
+    scheme, _, access_token = request.headers.get("Authorization", "").partition(" ")
+    access_token = access_token if scheme.lower() == "bearer" and access_token else None
+    if access_token:
+        authHandler.forget(access_token)
+    return await auth_services.logout(token, access_token)
 
 
 @routers.get("/me", response_model=UserResponse)
-def get_current_user(db: AsyncDbSession, current_user: CurrentUser):
+async def get_current_user(db: AsyncDbSession, current_user: CurrentUser):
     """ Get current user """
-    return auth_services.get_user_by_id(db, current_user.get_id())
+    return await auth_services.get_user_by_id(db, current_user.get_id())
 
 
 @routers.put("/change-password", status_code=status.HTTP_200_OK)
-def change_password(    
+async def change_password(    
     db: AsyncDbSession, 
     password_change: PasswordChange,
     current_user: CurrentUser
 ):
     """ Change password """
-    auth_services.change_password(db, current_user.get_id(), password_change)
+    await auth_services.change_password(db, current_user.get_id(), password_change)
+
+
+@routers.get("/password-hashing", response_model=PasswordHashingStats)
+async def get_password_hashing_stats(current_user: AdminUser):
+    """ Queue depth and timings of this worker's password hashing pool, admins only """
+    return password_hasher.stats()
+
+
+@routers.get("/token-cache", response_model=TokenCacheStats)
+async def get_token_cache_stats(current_user: AdminUser):
+    """ Size and hit/miss counters of this worker's verified-token cache, admins only """
+    return authHandler.stats()
 
 
 
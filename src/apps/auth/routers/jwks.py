@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..services.signing_keys import JWKS_MAX_AGE, signing_keys
+
+
+""" ===================== """
+""" JWKS router endpoints """
+""" ===================== """
+routers = APIRouter()
+
+
+@routers.get("/.well-known/jwks.json")
+async def get_jwks():
+    """ Public keys of the tokens this API signs, for verifying them without calling it """
+    return JSONResponse(
+        signing_keys.jwks(),
+        headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE}"},
+    )
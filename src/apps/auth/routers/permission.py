@@ -1,12 +1,13 @@
 from http import HTTPStatus
-from typing import List
 from uuid import UUID
 from fastapi import APIRouter, Path
 
 from src.apps.auth.crud import PermissionCRUDs
 from src.apps.auth.models import Permission
-from ..schemas import PermissionCreateModel, PermissionModel
+from ..schemas import PermissionCreateModel, PermissionModel, PermissionUpdateModel
+from src.utilities.pagination import Page
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.pagination import Pagination
 
 
 """ ===================== """
@@ -37,12 +38,15 @@ async def create_permission(db: AsyncDbSession, permission_data: PermissionCreat
     return PermissionModel.model_validate(permission)
 
 
-@routers.get("", response_model=List[PermissionModel])
-async def get_all_permissions(db: AsyncDbSession):
-    """API endpoint for listing all permission resources
+@routers.get("", response_model=Page[PermissionModel])
+async def get_all_permissions(db: AsyncDbSession, page: Pagination):
+    """API endpoint for listing permission resources, one keyset page at a time
     """
-    permissions = await permission_services.get_all(db)
-    return [PermissionModel.model_validate(b) for b in permissions]
+    permissions = await permission_services.get_all(db, page)
+    return Page[PermissionModel](
+        items=[PermissionModel.model_validate(b) for b in permissions.items],
+        next_cursor=permissions.next_cursor
+    )
 
 
 @routers.get("/{permission_id}")
@@ -62,25 +66,19 @@ async def get_by_id(db: AsyncDbSession,
     return permission
 
 
-@routers.patch("/{permission_id}")
-async def update_permission(db: AsyncDbSession, data: PermissionCreateModel, 
+@routers.patch("/{permission_id}", response_model=PermissionModel)
+async def update_permission(db: AsyncDbSession, data: PermissionUpdateModel, 
                       permission_id: UUID = Path(..., description="The permission id, you want to update: ")):
     """Update by ID
 
     Args:
         permission_id (UUID): ID of permission to update
-        data (PermissionCreateModel): data to update permission
+        data (PermissionUpdateModel): the fields to change, the others are left as they are
 
     Returns:
         dict: the updated permission
     """
-    permission = await permission_services.update(
-        db, 
-        permission_id, 
-        data={
-            "name": data.name
-        }
-    )
+    permission = await permission_services.update(db, permission_id, data.model_dump(exclude_unset=True))
     return permission
 
 
@@ -91,6 +89,4 @@ async def delete_permission(db: AsyncDbSession, permission_id: UUID = Path(...,
     Args:
         permission_id (UUID): ID of permission to delete
     """
-    permission = await permission_services.get_by_id(db, permission_id)
-    result = await permission_services.delete(db, permission)
-    return result
+    await permission_services.delete(db, permission_id)
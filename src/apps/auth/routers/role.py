@@ -1,12 +1,13 @@
 from http import HTTPStatus
-from typing import List
 from fastapi import APIRouter, Path
 from uuid import UUID
 from src.apps.auth.crud import RoleCRUDs
 from src.apps.auth.models import Role
 
-from ..schemas import RoleCreateModel, RoleModel
+from ..schemas import RoleCreateModel, RoleModel, RoleUpdateModel
+from src.utilities.pagination import Page
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.pagination import Pagination
 
 
 """ ===================== """
@@ -37,12 +38,15 @@ async def create_role(db: AsyncDbSession, role_data: RoleCreateModel):
     return role
 
 
-@routers.get("", response_model=List[RoleModel])
-async def get_all_roles(db: AsyncDbSession):
-    """API endpoint for listing all role resources
+@routers.get("", response_model=Page[RoleModel])
+async def get_all_roles(db: AsyncDbSession, page: Pagination):
+    """API endpoint for listing role resources, one keyset page at a time
     """
-    roles = await role_services.get_all(db)
-    return [RoleModel.model_validate(role) for role in roles]
+    roles = await role_services.get_all(db, page)
+    return Page[RoleModel](
+        items=[RoleModel.model_validate(role) for role in roles.items],
+        next_cursor=roles.next_cursor
+    )
 
 
 @routers.get("/{role_id}")
@@ -79,14 +83,14 @@ async def get_permissions_by_role_id(db: AsyncDbSession,
     return permissions
 
 
-@routers.patch("/{role_id}")
-async def update_role(db: AsyncDbSession, role_data: RoleCreateModel,  
+@routers.patch("/{role_id}", response_model=RoleModel)
+async def update_role(db: AsyncDbSession, role_data: RoleUpdateModel,  
                       role_id: UUID = Path(..., description="The role id, you want to update: ")):
     """Update by ID
 
     Args:
         role_id (UUID): ID of role to update
-        data (RoleCreateModel): data to update role
+        role_data (RoleUpdateModel): the fields to change, permission_ids replaces the role's permissions
 
     Returns:
         dict: the updated role
@@ -94,7 +98,7 @@ async def update_role(db: AsyncDbSession, role_data: RoleCreateModel,
     role = await role_services.update(
         db, 
         role_id, 
-        role_data,
+        role_data.model_dump(exclude_unset=True, exclude={"permission_ids"}),
         role_data.permission_ids
     )
     return role
@@ -107,6 +111,4 @@ async def delete_role(db: AsyncDbSession, role_id: UUID = Path(..., description=
     Args:
         role_id (UUID): ID of role to delete
     """
-    role = await role_services.get_by_id(db, role_id)
-    result = await role_services.delete(db, role)
-    return result
+    await role_services.delete(db, role_id)
@@ -1,12 +1,16 @@
 from http import HTTPStatus
-from typing import List
 from uuid import UUID
 from fastapi import APIRouter, Path
 
 from src.apps.auth.crud import UserCRUDs
 from src.apps.auth.models import User
-from ..schemas import UserCreateModel, UserModel
+from ..schemas import UserCreateModel, UserModel, UserUpdateModel
+from src.utilities.batch import Batch, BatchRequest
+from src.utilities.pagination import Page
+from src.api.dependencies.batch import BatchIds
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.fieldsets import UserFields
+from src.api.dependencies.pagination import Pagination
 
 
 """ ===================== """
@@ -34,29 +38,50 @@ async def create_user(db: AsyncDbSession, user_data: UserCreateModel):
     return user
 
 
-@routers.get("", response_model=List[UserModel])
-async def get_all_users(db: AsyncDbSession):
-    """API endpoint for listing all user resources
+@routers.get("", response_model=Page[UserModel])
+async def get_all_users(db: AsyncDbSession, page: Pagination, fields: UserFields, ids: BatchIds):
+    """API endpoint for listing user resources, one keyset page at a time
+
+    With `?fields=id,username` only those columns are read and returned. With
+    `?ids=` those users are returned instead of a page, shaped as the
+    POST /batch response.
     """
-    users = await user_services.get_all(db)
-    return users
+    if ids is not None:
+        users = await user_services.get_many(db, ids, fields.names)
+        return fields.respond(users, Batch)
+    users = await user_services.get_all(db, page, fields.names)
+    return fields.render(users, Page)
 
 
-@routers.get("/{user_id}")
-async def get_user_by_id(db: AsyncDbSession, 
-    user_id: int = Path(..., description="The user id, you want to find: ", gt=0),
+@routers.post("/batch", response_model=Batch[UserModel])
+async def get_users_batch(db: AsyncDbSession, data: BatchRequest):
+    """API endpoint for fetching many users by id at once
+
+    Args:
+        data (BatchRequest): the user ids, at most MAX_BATCH_SIZE
+
+    Returns:
+        dict: the users found, in the order of the ids, and the ids not found
+    """
+    return await user_services.get_many(db, data.ids)
+
+
+@routers.get("/{user_id}", response_model=UserModel)
+async def get_user_by_id(db: AsyncDbSession, fields: UserFields,
+    user_id: UUID = Path(..., description="The user id, you want to find: "),
     # query_param: str = Query(None, max_length=5)
 ):
     """API endpoint for retrieving a user by its ID
 
     Args:
-        user_id (int): the ID of the user to retrieve
+        user_id (UUID): the ID of the user to retrieve
+        fields (str): optional comma separated subset of the user fields
 
     Returns:
         dict: The retrieved user
     """
-    user = await user_services.get_by_id(db, user_id)
-    return user
+    user = await user_services.get_by_id(db, user_id, fields.names)
+    return fields.render(user)
 
 
 @routers.get("/{user_id}/roles")
@@ -93,38 +118,27 @@ async def get_permissions_by_user_id(db: AsyncDbSession,
     return permissions
 
 
-@routers.patch("/{user_id}")
-async def update_user(db: AsyncDbSession, data: UserCreateModel, 
+@routers.patch("/{user_id}", response_model=UserModel)
+async def update_user(db: AsyncDbSession, data: UserUpdateModel, 
                       user_id: UUID = Path(..., description="The user id, you want to update: ")):
     """Update by ID
 
     Args:
         user_id (UUID): ID of user to update
-        data (UserCreateModel): data to update user
+        data (UserUpdateModel): the fields to change, the others are left as they are
 
     Returns:
         dict: the updated user
     """
-    user = await user_services.update(
-        db, 
-        user_id, 
-        data={
-            "title": data.title, 
-            "author_id": data.author_id, 
-            "description": data.description, 
-            "rating": data.rating
-        }
-    )
+    user = await user_services.update(db, user_id, data.model_dump(exclude_unset=True))
     return user
 
 
 @routers.delete("/{user_id}", status_code=HTTPStatus.NO_CONTENT)
-async def delete_user(db: AsyncDbSession, user_id: int = Path(..., description="The user id, you want to delete: ")) -> None:
+async def delete_user(db: AsyncDbSession, user_id: UUID = Path(..., description="The user id, you want to delete: ")) -> None:
     """Delete user by id
 
     Args:
-        user_id (str): ID of user to delete
+        user_id (UUID): ID of user to delete
     """
-    user = await user_services.get_by_id(db, user_id)
-    result = await user_services.delete(db, user)
-    return result
+    await user_services.delete(db, user_id)
@@ -15,12 +15,19 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     sub: str  # username or user ID
     role: Optional[str] = None
+    roles: Optional[List[str]] = None
     permissions: Optional[List[str]] = None
+    jti: Optional[str] = None  # token id, what a revocation check looks up
+    exp: Optional[int] = None
     
+    def get_id(self) -> uuid.UUID:
+        return uuid.UUID(self.sub)
+
     def get_uuid(self) -> uuid.UUID | None:
-        if self.user_id:
-            return self.user_id
-        return None
+        try:
+            return self.get_id()
+        except ValueError:
+            return None
     
 class LoginResponse(BaseModel):
     user_id: uuid.UUID
@@ -35,3 +42,22 @@ class RegisterUserRequest(BaseModel):
     last_name: str
     password: str
 
+
+class PasswordHashingStats(BaseModel):
+    workers: int
+    max_wait: float
+    max_queue: int
+    global_limit: int  # hashes running at once across all workers
+    waiting: int  # calls queued for a worker right now
+    running: int
+    completed: int
+    rejected: int  # calls answered with 503 after max_wait
+    average_wait: float
+    average_run: float
+
+
+class TokenCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
@@ -14,6 +14,11 @@ class PermissionBase(BaseModel):
 class PermissionCreateModel(PermissionBase):
     pass
 
+class PermissionUpdateModel(BaseModel):
+    # PATCH: only the fields sent are written
+    name: Optional[str] = None
+    description: Optional[str] = None
+
 class PermissionModel(PermissionBase):
     id: uuid.UUID
 
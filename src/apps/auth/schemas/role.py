@@ -15,6 +15,12 @@ class RoleBase(BaseModel):
 class RoleCreateModel(RoleBase):
     permission_ids: Optional[List[uuid.UUID]] = Field(default_factory=list)
 
+class RoleUpdateModel(BaseModel):
+    # PATCH: only the fields sent are written; permission_ids replaces the role's permissions
+    name: Optional[str] = None
+    description: Optional[str] = None
+    permission_ids: Optional[List[uuid.UUID]] = None
+
 class RoleModel(RoleBase):
     id: uuid.UUID
     permissions: List[PermissionModel] = Field(default_factory=list)
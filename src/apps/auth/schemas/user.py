@@ -19,6 +19,12 @@ class UserCreateModel(UserBase):
     password: PasswordStr
     role_ids: Optional[List[uuid.UUID]] = Field(default_factory=list)
 
+class UserUpdateModel(BaseModel):
+    # PATCH: only the fields sent are written; passwords change through PasswordChange
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
 class UserResponse(UserBase):
     id: uuid.UUID
 
@@ -1 +1,2 @@
-from .auth import *
\ No newline at end of file
+from .auth import *
+from .passwords import *
\ No newline at end of file
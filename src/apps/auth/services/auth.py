@@ -1,26 +1,30 @@
 from datetime import timedelta, datetime, timezone
-from typing import Annotated
+from typing import Annotated, Optional
 import uuid
 import redis.asyncio as redis
 from fastapi import Depends, Response
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from passlib.context import CryptContext
 import logging
-from jose import ExpiredSignatureError, JWTError, jwt
+from jose import ExpiredSignatureError, JWTError
 
 from src.core.config import settings
 from ..models import Role, User
 from ..schemas import LoginResponse, UserResponse, PasswordChange, Token, RegisterUserRequest
+from .login_guard import login_guard
+from .passwords import password_hasher
+from .signing_keys import signing_keys
+from .token_denylist import token_denylist
+from src.apps.books.exceptions import ObjectCreationError
 from ..exceptions import AuthenticationError, InvalidPasswordError, PasswordMismatchError, RefreshTokenExpireError, RefreshTokenInvalidError, RefreshTokenMissingError, RefreshTokenTypeInvalidError, UserNotFoundError
 
 # You would want to store this in an environment variable or a secret manager
 
 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='/token')
-bcrypt_context = CryptContext(schemes=['bcrypt'], bcrypt__rounds=12)#, deprecated='auto'
 
 class AuthServices:
     """ 
@@ -29,12 +33,20 @@ class AuthServices:
      ==================== 
     """
     async def register_user(self, db: AsyncSession, register_user_request: RegisterUserRequest) -> User:
+        # refuse before spending a bcrypt hash on a request that cannot succeed
+        password_hasher.admit()
+        taken = await db.scalar(select(exists().where(User.username == register_user_request.username)))
+        if taken:
+            logging.warning(f"Rejected registration of existing username: {register_user_request.username}")
+            raise ObjectCreationError("Username already exists.")
+
+        password_hash = await password_hasher.hash(register_user_request.password)
         try:
             create_user_model = User(
                 username=register_user_request.username,
                 first_name=register_user_request.first_name,
                 last_name=register_user_request.last_name,
-                password_hash=self.__get_password_hash(register_user_request.password)
+                password_hash=password_hash
             )    
             
             db.add(create_user_model)
@@ -46,12 +58,8 @@ class AuthServices:
         
         except Exception as e:
             logging.error(f"Failed to register user: {register_user_request.username}. Error: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
-        
-    @staticmethod
-    def __get_password_hash(password: str) -> str:
-        return bcrypt_context.hash(password)
 
     @staticmethod
     async def get_user_by_id(db: AsyncSession, user_id: int) -> UserResponse:
@@ -71,7 +79,7 @@ class AuthServices:
             user = await self.get_user_by_id(db, user_id)
             
             # Verify current password
-            if not self.__verify_password(password_change.current_password, user.password_hash):
+            if not await password_hasher.verify(password_change.current_password, user.password_hash):
                 logging.warning(f"Invalid current password provided for user ID: {user_id}")
                 raise InvalidPasswordError()
             
@@ -81,7 +89,7 @@ class AuthServices:
                 raise PasswordMismatchError()
             
             # Update password
-            user.password_hash = self.__get_password_hash(password_change.new_password)
+            user.password_hash = await password_hasher.hash(password_change.new_password)
             await db.commit()
             logging.info(f"Successfully changed password for user ID: {user_id}")
         except Exception as e:
@@ -142,20 +150,35 @@ class AuthServices:
     
     
     async def __authenticate_user(self, db: AsyncSession, username: str, password: str) -> User | bool:
+        # locked out usernames and a saturated hashing pool are refused before any query or bcrypt work
+        password_hasher.admit()
+        await login_guard.reserve(username)
+
         result = await db.execute(
             select(User)
             .options(selectinload(User.roles).selectinload(Role.permissions))
             .filter(User.username == username))
         user = result.scalar_one_or_none()
         
-        if not user or not self.__verify_password(password, user.password_hash):
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash) if user else (False, None)
+        if not valid:
             logging.warning(f"Failed authentication attempt for username: {username}")
             return False
+        await login_guard.succeeded(username)
+        if new_hash:
+            await self.__rehash_password(db, user, new_hash)
         return user
 
     @staticmethod
-    def __verify_password(plain_password: str, hashed_password: str) -> bool:
-        return bcrypt_context.verify(plain_password, hashed_password)
+    async def __rehash_password(db: AsyncSession, user: User, new_hash: str):
+        """Store the hash of the current policy in place of an older one; a failure does not fail the login"""
+        try:
+            await db.execute(update(User).where(User.id == user.id).values(password_hash=new_hash))
+            await db.commit()
+            logging.info(f"Rehashed password of user ID: {user.id} with the current policy")
+        except SQLAlchemyError as e:
+            logging.error(f"Failed to rehash password of user ID: {user.id}. Error: {str(e)}")
+            await db.rollback()
 
 
     @staticmethod
@@ -167,7 +190,7 @@ class AuthServices:
             'jti': token_id,
             "type": token_type
         })
-        return jwt.encode(encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM), token_id
+        return signing_keys.encode(encode), token_id
 
     def __create_access_token(self, data: dict):
         return self.__create_token(data, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES), "access")
@@ -197,7 +220,7 @@ class AuthServices:
         token = auth_header.split(" ")[1]
 
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = signing_keys.decode(token)
             if payload.get("type") != "refresh":
                 raise RefreshTokenTypeInvalidError()
             user_id = payload.get("sub")
@@ -231,7 +254,7 @@ class AuthServices:
             raise RefreshTokenMissingError()
 
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = signing_keys.decode(token)
             if payload.get("type") != "refresh":
                 raise RefreshTokenTypeInvalidError()
             jti = payload.get("jti")
@@ -262,14 +285,22 @@ class AuthServices:
         return {"access_token": new_access_token, "token_type": "bearer"}
 
 
-    async def logout(self, token: str):
+    async def logout(self, token: str, access_token: Optional[str] = None):
         if token:
             try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                payload = signing_keys.decode(token)
                 jti = payload.get("jti")
                 await self.redis_client.delete(f"refresh:{jti}")
             except JWTError:
                 pass
+        if access_token:
+            # the access token stays valid until exp otherwise, cached or not
+            try:
+                payload = signing_keys.decode(access_token)
+                if payload.get("jti"):
+                    await token_denylist.revoke(payload["jti"], payload.get("exp"))
+            except JWTError:
+                pass
 
         response = Response()
         response.delete_cookie("refresh_token")
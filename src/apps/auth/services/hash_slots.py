@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import redis_client
+from ..exceptions import PasswordHasherBusyError
+
+
+KEY = "password-hash:slots"
+# a slot not released within this many seconds (a worker died mid-hash) is freed
+LEASE_SECONDS = 30
+# how often a call waiting for a slot asks again (seconds)
+POLL_INTERVAL = 0.05
+
+
+class HashSlots:
+    """Limit on bcrypt calls running at once across every worker, a Redis sorted set of leases
+
+    Each running call holds one member, scored with the time it was taken. A
+    call adds itself and keeps its slot when fewer than PASSWORD_HASH_GLOBAL_LIMIT
+    members are ahead of it, otherwise it removes itself and asks again until
+    its wait runs out. Members older than LEASE_SECONDS are dropped first, so
+    slots of a crashed worker come back on their own. When Redis is unreachable
+    the limit is skipped and logged, the per-worker pool still bounds each process.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """Take a slot within timeout seconds and return its token, None when Redis is unreachable"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.time()
+            try:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    _, _, rank = await (
+                        pipe.zremrangebyscore(KEY, "-inf", now - LEASE_SECONDS)
+                        .zadd(KEY, {token: now})
+                        .zrank(KEY, token)
+                        .execute()
+                    )
+                if rank < self.limit:
+                    return token
+                await redis_client.zrem(KEY, token)
+            except RedisError as e:
+                logging.warning(f"Failed to take a password hashing slot. Error: {str(e)}")
+                return None
+            if time.monotonic() >= deadline:
+                raise PasswordHasherBusyError()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def release(self, token: Optional[str]):
+        if token is None:
+            return
+        try:
+            await redis_client.zrem(KEY, token)
+        except RedisError as e:
+            logging.warning(f"Failed to release a password hashing slot. Error: {str(e)}")
+
+
+hash_slots = HashSlots(settings.PASSWORD_HASH_GLOBAL_LIMIT)
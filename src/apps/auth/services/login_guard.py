@@ -0,0 +1,54 @@
+import logging
+
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import redis_client
+from ..exceptions import TooManyLoginAttemptsError
+
+
+KEY_PREFIX = "login:failures:"
+
+
+class LoginGuard:
+    """Per-username login attempt counters in Redis, shared by every worker
+
+    reserve() runs before the user is read or any bcrypt work is done and
+    counts the attempt in the same atomic step as it checks the limit, so
+    concurrent guesses cannot all slip in before any of them is counted: once
+    a username used LOGIN_MAX_FAILURES attempts within LOGIN_FAILURE_WINDOW
+    seconds, further attempts are refused with 429 until the window (counted
+    from the first attempt) ends. A successful login clears the counter, so
+    only failures add up. When Redis is unreachable the guard lets attempts
+    through and logs, the hashing pool still bounds their cost.
+    """
+    def __init__(self, max_failures: int, window: int):
+        self.max_failures = max_failures
+        self.window = window
+
+    @staticmethod
+    def key(username: str) -> str:
+        return KEY_PREFIX + username.strip().lower()
+
+    async def reserve(self, username: str):
+        """Count an attempt for username, or raise TooManyLoginAttemptsError when it is over the limit"""
+        key = self.key(username)
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                # the window starts at the first attempt and is not extended by later ones
+                _, attempts, ttl = await pipe.set(key, 0, ex=self.window, nx=True).incr(key).ttl(key).execute()
+        except RedisError as e:
+            logging.warning(f"Failed to count login attempt. Error: {str(e)}")
+            return
+        if attempts > self.max_failures:
+            logging.warning(f"Rejected login attempt for locked out username: {username}")
+            raise TooManyLoginAttemptsError(max(ttl, 1))
+
+    async def succeeded(self, username: str):
+        try:
+            await redis_client.delete(self.key(username))
+        except RedisError as e:
+            logging.warning(f"Failed to reset login failures. Error: {str(e)}")
+
+
+login_guard = LoginGuard(settings.LOGIN_MAX_FAILURES, settings.LOGIN_FAILURE_WINDOW)
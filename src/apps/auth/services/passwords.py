@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+from src.core.config import settings
+from ..exceptions import PasswordHasherBusyError
+from .hash_slots import HashSlots, hash_slots
+
+
+T = TypeVar("T")
+
+# bcrypt costs the calibration tries, 2^rounds iterations each
+CALIBRATION_ROUNDS = range(10, 17)
+
+
+def build_context(rounds: int) -> CryptContext:
+    """The password hashing policy: bcrypt at exactly this cost
+
+    Pinning min and max rounds to the cost makes any stored hash of another cost
+    (lower or higher) "need an update", which verify_and_update() turns into a
+    new hash on the next successful login.
+    """
+    return CryptContext(
+        schemes=['bcrypt'],
+        deprecated='auto',
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+bcrypt_context = build_context(settings.PASSWORD_BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification off the event loop, on a bounded thread pool
+
+    bcrypt releases the GIL, so PASSWORD_HASH_WORKERS threads hash in parallel
+    while the loop keeps serving other requests. A call first waits for a free
+    worker; when none frees up within PASSWORD_HASH_MAX_WAIT seconds it fails
+    with 503 instead of queueing without bound behind a login burst, and with
+    PASSWORD_HASH_MAX_QUEUE calls already waiting it fails right away. The pool
+    itself therefore never queues: at most `workers` calls are handed to it.
+    These limits are per process; a call also takes one of the cluster-wide
+    HashSlots within the same wait, so N workers do not mean N times the bcrypt load.
+    """
+    def __init__(self, workers: int, max_wait: float, max_queue: int, slots: HashSlots):
+        self.workers = workers
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.slots = slots
+        self._slots = asyncio.Semaphore(workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # metrics, see stats()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+
+    async def stop(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown)
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new call would be refused without waiting"""
+        return self.waiting >= self.max_queue
+
+    def admit(self):
+        """Refuse early, before any other work of a request that will need the pool"""
+        if self.saturated:
+            self.rejected += 1
+            raise PasswordHasherBusyError()
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """Call function(*args) on a pool thread once a worker is free, or raise PasswordHasherBusyError"""
+        self.admit()
+        self.start()
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.waiting -= 1
+            self.rejected += 1
+            logging.warning(f"Password hashing rejected after waiting {self.max_wait}s, {self.waiting} calls waiting.")
+            raise PasswordHasherBusyError()
+        try:
+            # the rest of the same wait goes to a slot shared by every worker
+            token = await self.slots.acquire(self.max_wait - (time.perf_counter() - queued_at))
+        except PasswordHasherBusyError:
+            self.rejected += 1
+            self._slots.release()
+            logging.warning(f"Password hashing rejected after waiting {self.max_wait}s for a global slot.")
+            raise
+        except BaseException:
+            self._slots.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.wait_seconds += started_at - queued_at
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.run_seconds += time.perf_counter() - started_at
+            self._slots.release()
+            await self.slots.release(token)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(bcrypt_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self.run(bcrypt_context.verify, password, password_hash)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and when the hash is valid but not of the current policy, also return its replacement"""
+        return await self.run(bcrypt_context.verify_and_update, password, password_hash)
+
+    def stats(self) -> dict:
+        """Queue depth and timings since the worker started"""
+        return {
+            "workers": self.workers,
+            "max_wait": self.max_wait,
+            "max_queue": self.max_queue,
+            "global_limit": self.slots.limit,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_wait": self.wait_seconds / self.completed if self.completed else 0.0,
+            "average_run": self.run_seconds / self.completed if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_WAIT, settings.PASSWORD_HASH_MAX_QUEUE, hash_slots
+)
+
+
+def calibrate(samples: int = 3) -> List[Tuple[int, float]]:
+    """Median seconds of one bcrypt hash on this machine, for every cost of CALIBRATION_ROUNDS"""
+    timings = []
+    for rounds in CALIBRATION_ROUNDS:
+        context = build_context(rounds)
+        durations = []
+        for _ in range(samples):
+            started_at = time.perf_counter()
+            context.hash("calibration password")
+            durations.append(time.perf_counter() - started_at)
+        timings.append((rounds, sorted(durations)[len(durations) // 2]))
+        if durations[0] > 2:
+            # higher costs only take longer
+            break
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the bcrypt cost for a target hash latency on this machine")
+    parser.add_argument("--target-ms", type=float, default=250, help="longest acceptable time of one hash")
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per cost")
+    args = parser.parse_args()
+
+    timings = calibrate(args.samples)
+    chosen = CALIBRATION_ROUNDS[0]
+    for rounds, seconds in timings:
+        if seconds * 1000 <= args.target_ms:
+            chosen = rounds
+        print(f"rounds {rounds}: {seconds * 1000:.0f} ms")
+    print(f"\nPASSWORD_BCRYPT_ROUNDS={chosen}  (current: {settings.PASSWORD_BCRYPT_ROUNDS})")
+    print(f"one worker thread then verifies about {1 / dict(timings)[chosen]:.1f} passwords per second")
+
+
+if __name__ == "__main__":
+    # python -m src.apps.auth.services.passwords --target-ms 250
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+
+from src.core.config import settings
+
+
+ALGORITHM = "ES256"
+# how long verifiers may cache /.well-known/jwks.json (seconds); a new key is
+# published at least this long before it signs, so nobody sees an unknown kid
+JWKS_MAX_AGE = 300
+# how often signing and the JWKS look for added or removed key files (seconds)
+RELOAD_INTERVAL = 60.0
+# kid of generated keys, the UTC time they were created
+KID_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+class SigningKey:
+    def __init__(self, kid: str, pem: str, created: float):
+        self.kid = kid
+        self.created = created
+        self.private_key: Key = jwk.construct(pem, ALGORITHM)
+        self.public_key: Key = self.private_key.public_key()
+        self.jwk = {**self.public_key.to_dict(), "kid": kid, "use": "sig", "alg": ALGORITHM}
+
+
+class SigningKeys:
+    """The ES256 keys tokens are signed and verified with, one `<kid>.pem` per key in JWT_KEYS_DIR
+
+    Rotation needs no restart: add a key file (`python -m
+    src.apps.auth.services.signing_keys`), it is published in the JWKS right
+    away and takes over signing JWKS_MAX_AGE seconds later; delete the old
+    file once the tokens it signed have expired (REFRESH_EXPIRE_DAYS). Tokens
+    carry the kid of their key in the header; a kid this worker does not know
+    makes it re-read the directory once before refusing the token.
+
+    Without key files tokens are signed and verified with SECRET_KEY/ALGORITHM
+    as before. Once there are keys, tokens without a kid are refused unless
+    JWT_ACCEPT_SECRET_KEY is set for the switch-over; turn it off after.
+    """
+    def __init__(self, directory: Optional[str], accept_secret_key: bool):
+        self.directory = Path(directory) if directory else None
+        self.accept_secret_key = accept_secret_key
+        self.keys: Dict[str, SigningKey] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self):
+        """Re-read the key files when the directory changed since the last read"""
+        self._checked_at = time.monotonic()
+        if self.directory is None:
+            return
+        try:
+            mtime = self.directory.stat().st_mtime
+            if mtime == self._mtime:
+                return
+            keys = {}
+            for path in sorted(self.directory.glob("*.pem")):
+                keys[path.stem] = SigningKey(path.stem, path.read_text(), self.created(path))
+        except (OSError, ValueError, JWTError) as e:
+            logging.error(f"Failed to load JWT signing keys. Error: {str(e)}")
+            return
+        self.keys, self._mtime = keys, mtime
+        logging.info(f"Loaded {len(keys)} JWT signing keys.")
+
+    @staticmethod
+    def created(path: Path) -> float:
+        """When the key was created, from its kid; the file mtime changes with copies and restores"""
+        try:
+            return datetime.strptime(path.stem, KID_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            # a key not made by generate_key()
+            return path.stat().st_mtime
+
+    def __reload_periodically(self):
+        if time.monotonic() - self._checked_at > RELOAD_INTERVAL:
+            self.reload()
+
+    @property
+    def signing_key(self) -> Optional[SigningKey]:
+        """The newest key published for at least JWKS_MAX_AGE, or the oldest one while none is"""
+        if not self.keys:
+            return None
+        keys = sorted(self.keys.values(), key=lambda key: key.created)
+        published = [key for key in keys if key.created <= time.time() - JWKS_MAX_AGE]
+        return published[-1] if published else keys[0]
+
+    def encode(self, claims: dict) -> str:
+        self.__reload_periodically()
+        key = self.signing_key
+        if key is None:
+            return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        return jwt.encode(claims, key.private_key, algorithm=ALGORITHM, headers={"kid": key.kid})
+
+    def decode(self, token: str) -> dict:
+        """Verify token against the key named by its kid and return its claims, raises JWTError"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            # without key files SECRET_KEY is what tokens are signed with
+            if self.keys and not self.accept_secret_key:
+                raise JWTError("token without a key id")
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        key = self.keys.get(kid)
+        if key is None:
+            # signed by another worker with a key added since this one last looked
+            self.reload()
+            key = self.keys.get(kid)
+            if key is None:
+                raise JWTError("unknown key id")
+        return jwt.decode(token, key.public_key, algorithms=[ALGORITHM])
+
+    def jwks(self) -> dict:
+        """The public keys as a JWK set, for /.well-known/jwks.json"""
+        self.__reload_periodically()
+        return {"keys": [key.jwk for key in self.keys.values()]}
+
+
+signing_keys = SigningKeys(settings.JWT_KEYS_DIR, settings.JWT_ACCEPT_SECRET_KEY)
+
+
+def generate_key(directory: Path) -> Path:
+    """Write a new P-256 private key as `<kid>.pem`, readable by the owner only"""
+    directory.mkdir(parents=True, exist_ok=True)
+    kid = datetime.now(timezone.utc).strftime(KID_FORMAT)
+    pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    path = directory / f"{kid}.pem"
+    # write next to the key files, then rename, so a reader never sees half a key
+    partial = directory / f".{kid}.tmp"
+    with os.fdopen(os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        f.write(pem)
+    os.replace(partial, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add a JWT signing key; it signs tokens once published for JWKS_MAX_AGE seconds")
+    parser.add_argument("--dir", default=settings.JWT_KEYS_DIR, help="key directory (default: JWT_KEYS_DIR)")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("no key directory, set JWT_KEYS_DIR or pass --dir")
+
+    path = generate_key(Path(args.dir))
+    keys = sorted(p.stem for p in Path(args.dir).glob("*.pem"))
+    print(f"Created {path}, signing in {JWKS_MAX_AGE} seconds")
+    print(f"keys: {', '.join(keys)}")
+
+
+if __name__ == "__main__":
+    # python -m src.apps.auth.services.signing_keys
+    main()
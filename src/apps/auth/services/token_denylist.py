@@ -0,0 +1,39 @@
+import logging
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from src.core.redis import redis_client
+
+
+KEY_PREFIX = "revoked:"
+
+
+class TokenDenylist:
+    """Ids (jti) of revoked tokens in Redis, shared by every worker
+
+    An entry lives until the token it revokes would have expired anyway, so the
+    list only ever holds tokens that are still otherwise valid. is_revoked()
+    runs on every authenticated request, after the verified-token cache; when
+    Redis is unreachable it lets the token through and logs, like the login
+    guard.
+    """
+    async def revoke(self, jti: str, exp: Optional[int]):
+        ttl = int(exp - time.time()) + 1 if exp is not None else 0
+        if ttl <= 0:
+            return
+        try:
+            await redis_client.set(KEY_PREFIX + jti, 1, ex=ttl)
+        except RedisError as e:
+            logging.warning(f"Failed to revoke token {jti}. Error: {str(e)}")
+
+    async def is_revoked(self, jti: str) -> bool:
+        try:
+            return bool(await redis_client.exists(KEY_PREFIX + jti))
+        except RedisError as e:
+            logging.warning(f"Failed to check token revocation. Error: {str(e)}")
+            return False
+
+
+token_denylist = TokenDenylist()
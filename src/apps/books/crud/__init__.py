@@ -1,4 +1,6 @@
 from .author import AuthorCRUD
 from .book import BookCRUD
 from .category import CategoryCRUD
-from .publisher import PublisherCRUD
\ No newline at end of file
+from .publisher import PublisherCRUD
+from .stats import StatsCRUD
+from .changes import ChangeCRUD
\ No newline at end of file
@@ -1,12 +1,20 @@
 import logging
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
 from pydantic import ValidationError
 from sqlalchemy import select
-from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-# from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError
 
 from src.apps.books.models import Author, Book
+from ..filters import PopularityFilters
 from ..exceptions import ObjectVerificationError, ObjectCreationError, ObjectNotFoundError
+from src.apps.books.services import name_typeahead, upsert_names
+from src.utilities.fieldsets import select_fields
+from src.utilities.batch import Batch, get_batch
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import delete_by_id, update_by_id
 
 class AuthorCRUD:
     """ ==================== """
@@ -34,34 +42,63 @@ class AuthorCRUD:
             raise ObjectCreationError(str(e))        
 
 
-    async def get_all(self, db: AsyncSession):
+    async def get_all(
+        self, db: AsyncSession, page: PageParams, fields: Optional[Sequence[str]] = None,
+        filters: Optional[PopularityFilters] = None
+    ):
         """
-        Get all Authors objects from db
+        Get a page of Authors objects from db, ordered by (name, id) or (book_count, id)
+        Only the given columns are selected when fields is set
         """
-        statement = select(Author).order_by(Author.id)
-
-        result = await db.execute(statement)
-        authors = result.scalars().all()
+        sort_column = filters.sort_column(Author) if filters else Author.name
+        descending = filters.descending if filters else False
+        statement = select_fields(Author, fields, sort_column, Author.id)
+        if filters:
+            statement = statement.where(*filters.clauses(Author))
+        page = await paginate(db, statement, page, sort_column, Author.id, descending)
         
-        logging.info(f"Retrieved {len(authors)} authors.")
-        return authors
+        logging.info(f"Retrieved {len(page.items)} authors.")
+        return page
+
+
+    async def typeahead(self, db: AsyncSession, q: str, limit: int = 10) -> bytes:
+        """
+        Get the closest author names to q (prefix first, then fuzzy) as JSON
+        """
+        return await name_typeahead(db, Author, q, limit)
+
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[UUID], fields: Optional[Sequence[str]] = None) -> Batch:
+        """
+        Get authors by a list of ids in one query, in the order of ids, with the ids not found
+        """
+        return await get_batch(db, Author, ids, fields)
+
+
+    async def bulk_upsert(self, db: AsyncSession, names: List[str]):
+        """
+        Create the missing authors and get the ids of all names in one statement
+        """
+        return await upsert_names(db, Author, names)
 
 
     async def get_by_id(
-        self, db: AsyncSession, author_id: int
+        self, db: AsyncSession, author_id: UUID, fields: Optional[Sequence[str]] = None
     ):
         """
-        Get author by id
+        Get author by id, only the given columns when fields is set
         """
-        try:
-            statement = select(Author).filter(Author.id == author_id)
-            result = await db.execute(statement)           
-            author = result.scalars().one()
-            logging.info(f"Retrieved author {author_id}.")
-            return author
-        except NoResultFound:
+        if fields:
+            result = await db.execute(select_fields(Author, fields).filter(Author.id == author_id))
+            author = result.one_or_none()
+        else:
+            author = await get_loader(db, Author).load(author_id)
+
+        if author is None:
             logging.warning(f"Author with id {author_id} not found.")
             raise ObjectNotFoundError("Author", author_id)
+        logging.info(f"Retrieved author {author_id}.")
+        return author
             
         
     async def get_books_by_id(
@@ -71,9 +108,7 @@ class AuthorCRUD:
         Get author by id
         """
         # First check if the author exists
-        author_stmt = select(Author).filter(Author.id == author_id)
-        author_result = await db.execute(author_stmt)
-        author = author_result.scalar_one_or_none()
+        author = await get_loader(db, Author).load(author_id)
 
         if not author:
             logging.warning(f"Author with id {author_id} not found.")
@@ -89,36 +124,39 @@ class AuthorCRUD:
             
 
     async def update(
-        self, db: AsyncSession, author_id, data
+        self, db: AsyncSession, author_id: UUID, data: Dict
     ):
         """
-        Update Author by id
+        Update only the given fields of a Author by id with one UPDATE ... RETURNING
         """
-        statement = select(Author).filter(Author.id == author_id)
-
-        result = await db.execute(statement)
-        author = result.scalars().scalar_one_or_none()
-
-        if not author:
-            logging.warning(f"Author {author_id} not found.")
-            raise ObjectNotFoundError("Author", author_id)
-        
-        author.name = data["name"]
-
-        await db.commit()
-        await db.refresh(author)
+        try:
+            author = await update_by_id(db, Author, author_id, data)
+            if author is None:
+                logging.warning(f"Author {author_id} not found.")
+                raise ObjectNotFoundError("Author", author_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update author {author_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Author", str(e.orig))
 
         logging.info(f"Successfully updated author {author_id}.")
         return author
 
 
-    async def delete(self, db: AsyncSession, author: Author):
-        """delete author by id
+    async def delete(self, db: AsyncSession, author_id: UUID):
         """
-        await db.delete(author)
-        await db.commit()
-        await db.refresh(author)
+        Delete author by id with one DELETE ... RETURNING, refused while books refer to it
+        """
+        try:
+            author = await delete_by_id(db, Author, author_id)
+            if author is None:
+                logging.warning(f"Author {author_id} not found.")
+                raise ObjectNotFoundError("Author", author_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to delete author {author_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Author", "it still has books")
 
-        logging.info(f"Successfully deleted author {author.id}.")
-        return {}
-       
\ No newline at end of file
+        logging.info(f"Successfully deleted author {author_id}.")
@@ -1,13 +1,42 @@
 import logging
-from sqlalchemy import select
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID, uuid4
+from pydantic import ValidationError
+from sqlalchemy import Float, Select, func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError, IntegrityError
 
-from src.apps.books.models.book import Book
-from src.apps.books.models.category import BookCategory
+from src.core.database import AsyncSessionLocal
+from src.apps.books.models.author import Author
+from src.apps.books.models.book import SEARCH_CONFIG, Book
+from src.apps.books.models.category import BookCategory, BookCategoryClosure
+from src.apps.books.models.publisher import BookPublisher
 
+from ..filters import BookFilters
 from ..exceptions import ObjectCreationError, ObjectNotFoundError, ObjectVerificationError
+from src.apps.books.schemas.book import BookCreateModel, BookFacets, BookImportError, BookImportReport
+from src.apps.books.services import BookCounts, ParsedRecord, book_facets, catalog_stats, category_tree_cache, facet_cache
+from src.utilities.batch import Batch, get_batch
+from src.utilities.dataloader import get_loader
+from src.utilities.fieldsets import select_fields
+from src.utilities.pagination import Page, PageParams, apply_keyset, next_page, paginate
+from src.utilities.sql import any_of
+from src.utilities.writes import delete_by_id, update_by_id
+
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 1000
+
+# ?include= name -> (foreign key on Book, related model, key in BookIncluded)
+INCLUDED_RELATIONS = {
+    "author": (Book.author_id, Author, "authors"),
+    "publisher": (Book.publisher_id, BookPublisher, "publishers"),
+    "category": (Book.category_id, BookCategory, "categories"),
+}
 
 
 class BookCRUD:
@@ -20,48 +49,322 @@ class BookCRUD:
         """
         try:
             db.add(book)
+            # the counters change in the book's own transaction
+            await BookCounts().add(book).apply(db)
             await db.commit()
             await db.refresh(book)
-            
-            logging.info(f"Created new book.")
-            return book
-
-        except Exception as e:
+        except IntegrityError as e:
+            # duplicate title or a missing author, publisher or category
             logging.error(f"Failed to create book. Error: {str(e)}")
             await db.rollback()
-            raise ObjectVerificationError("Book", str(e))
-        except IntegrityError as e:
-            logging.error(f"This publisher already exists. Error: {str(e)}")
+            raise ObjectVerificationError("Book", str(e.orig))
+        except ValidationError as e:
+            logging.error(f"Failed to create book. Error: {str(e)}")
             await db.rollback()
-            raise ObjectCreationError("This publisher already exists.")
+            raise ObjectVerificationError("Book", str(e))
         except Exception as e:
-            logging.error(f"Failed to create publisher. Error: {str(e)}")
+            logging.error(f"Failed to create book. Error: {str(e)}")
             await db.rollback()
-            raise ObjectCreationError(str(e))  
+            raise ObjectCreationError(str(e))
+
+        # the book is committed: caches and stats follow it, their failures do not undo it
+        await category_tree_cache.invalidate()
+        facet_cache.clear()
+        catalog_stats.mark_book(book)
+
+        logging.info(f"Created new book.")
+        return book
     
-    async def get_all(self, db: AsyncSession):
+    async def get_all(
+        self, db: AsyncSession, page: PageParams, fields: Optional[Sequence[str]] = None, include: Sequence[str] = (),
+        filters: Optional[BookFilters] = None
+    ):
         """
-        Get all Books objects from db
+        Get a page of Books objects from db, ordered by (title, id) or the filters' sort key
+        Only the given columns (and the foreign keys of include) are selected when fields is set
         """
-        statement = select(Book).order_by(Book.id)
-        result = await db.execute(statement)
-        books = result.scalars().all()
+        sort_column = filters.sort_column if filters else Book.title
+        descending = filters.descending if filters else False
+        foreign_keys = [INCLUDED_RELATIONS[name][0] for name in include]
+        statement = select_fields(Book, fields, sort_column, Book.id, *foreign_keys)
+        if filters:
+            statement = statement.where(*filters.clauses())
+        page = await paginate(db, statement, page, sort_column, Book.id, descending)
         
-        logging.info(f"Retrieved {len(books)} books.")
-        return books
+        logging.info(f"Retrieved {len(page.items)} books.")
+        return page
+
+
+    async def get_many(
+        self, db: AsyncSession, ids: Sequence[UUID], fields: Optional[Sequence[str]] = None, include: Sequence[str] = ()
+    ) -> Batch:
+        """
+        Get books by a list of ids in one query, in the order of ids, with the ids not found
+        """
+        foreign_keys = [INCLUDED_RELATIONS[name][0] for name in include]
+        return await get_batch(db, Book, ids, fields, foreign_keys)
+
+
+    async def get_facets(self, db: AsyncSession, filters: Optional[BookFilters] = None) -> BookFacets:
+        """
+        Facet counts (category, publisher, decade, rating bucket) of the books matching filters
+        """
+        scope = select(Book.category_id, Book.publisher_id, Book.published_at, Book.rating)
+        if filters:
+            scope = scope.where(*filters.clauses())
+        key = ("books", filters.key if filters else None)
+        return await book_facets(db, scope, key, filtered=bool(filters and filters.filtered))
+
+
+    async def get_included(self, db: AsyncSession, books: Sequence, include: Sequence[str]) -> Dict[str, list]:
+        """
+        Side-load the related objects of books, one query per relation whatever the number of books
+        Each object appears once however many books refer to it
+        """
+        included = {}
+        for name in include:
+            foreign_key, model, key = INCLUDED_RELATIONS[name]
+            ids = dict.fromkeys(getattr(book, foreign_key.key) for book in books)
+            # batched through the request's loader, so objects already loaded are not queried again
+            related = await get_loader(db, model).load_many(ids)
+            included[key] = sorted((obj for obj in related if obj is not None), key=lambda obj: (obj.name, str(obj.id)))
+        return included
+
+
+    async def bulk_import(self, db: AsyncSession, records: AsyncIterator[ParsedRecord]) -> BookImportReport:
+        """
+        Create books from a stream of parsed records, IMPORT_CHUNK_SIZE at a time
+
+        Each chunk is validated against BookCreateModel, its author, publisher and
+        category ids are checked with one query per table, and the valid rows go in
+        with a single multi-row INSERT ... ON CONFLICT (title) DO NOTHING and one
+        commit. Rows that fail are reported by record number instead of aborting
+        the import.
+        """
+        report = BookImportReport()
+        chunk: List[Tuple[int, BookCreateModel]] = []
+        async for number, record in records:
+            report.received += 1
+            if isinstance(record, str):
+                report.errors.append(BookImportError(row=number, errors=[record]))
+                continue
+            try:
+                chunk.append((number, BookCreateModel.model_validate(record)))
+            except ValidationError as e:
+                report.errors.append(BookImportError(row=number, errors=[
+                    f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+                ]))
+                continue
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await self.__import_chunk(db, chunk, report)
+                chunk = []
+        if chunk:
+            await self.__import_chunk(db, chunk, report)
+
+        report.failed = len(report.errors)
+        report.errors.sort(key=lambda error: error.row)
+        if report.inserted:
+            await category_tree_cache.invalidate()
+            facet_cache.clear()
+
+        logging.info(f"Imported {report.inserted} of {report.received} books, {report.failed} rejected.")
+        return report
+
+
+    async def __import_chunk(self, db: AsyncSession, chunk: List[Tuple[int, BookCreateModel]], report: BookImportReport):
+        rows: List[Tuple[int, BookCreateModel]] = []
+        first_seen = {}
+        for number, book in chunk:
+            if book.title in first_seen:
+                report.errors.append(BookImportError(row=number, errors=[f"title: duplicates row {first_seen[book.title]}"]))
+                continue
+            first_seen[book.title] = number
+            rows.append((number, book))
+
+        missing_authors = await self.__missing_ids(db, Author.id, {book.author_id for _, book in rows})
+        missing_publishers = await self.__missing_ids(db, BookPublisher.id, {book.publisher_id for _, book in rows})
+        missing_categories = await self.__missing_ids(db, BookCategory.id, {book.category_id for _, book in rows})
+
+        valid: List[Tuple[int, BookCreateModel]] = []
+        for number, book in rows:
+            errors = []
+            if book.author_id in missing_authors:
+                errors.append(f"author_id: author {book.author_id} does not exist")
+            if book.publisher_id in missing_publishers:
+                errors.append(f"publisher_id: publisher {book.publisher_id} does not exist")
+            if book.category_id in missing_categories:
+                errors.append(f"category_id: category {book.category_id} does not exist")
+            if errors:
+                report.errors.append(BookImportError(row=number, errors=errors))
+            else:
+                valid.append((number, book))
+        if not valid:
+            return
+
+        statement = (
+            insert(Book)
+            # multi-row VALUES evaluates Python column defaults once per statement, so ids are set here;
+            # sorted by title so concurrent imports take the unique index locks in the same order
+            .values([{"id": uuid4(), **book.model_dump()} for _, book in sorted(valid, key=lambda row: row[1].title)])
+            .on_conflict_do_nothing(index_elements=[Book.title])
+            .returning(Book.title)
+        )
+        try:
+            result = await db.execute(statement)
+            inserted = set(result.scalars().all())
+            counts = BookCounts()
+            for _, book in valid:
+                if book.title in inserted:
+                    counts.add(book)
+            await counts.apply(db)
+            await db.commit()
+        except DBAPIError as e:
+            # integrity errors, but also deadlocks or timeouts: earlier chunks are committed, report this one
+            logging.error(f"Failed to import a chunk of {len(valid)} books. Error: {str(e)}")
+            await db.rollback()
+            for number, _ in valid:
+                report.errors.append(BookImportError(row=number, errors=[str(e.orig)]))
+            return
+
+        for number, book in valid:
+            if book.title in inserted:
+                report.inserted += 1
+                catalog_stats.mark_book(book)
+            else:
+                report.errors.append(BookImportError(row=number, errors=["title: a book with this title already exists"]))
+
+
+    @staticmethod
+    async def __missing_ids(db: AsyncSession, column, ids: Iterable[UUID]) -> Set[UUID]:
+        ids = set(ids)
+        if not ids:
+            return set()
+        result = await db.execute(select(column).where(any_of(column, ids)))
+        return ids - set(result.scalars().all())
+
+
+    async def search(
+        self, db: AsyncSession, q: str, page: PageParams,
+        author_id: Optional[UUID] = None, publisher_id: Optional[UUID] = None, category_id: Optional[UUID] = None
+    ):
+        """
+        Full-text search over book title and description, best matches first
+
+        Matching goes through the GIN index on search_vector. Hits are ranked with
+        ts_rank and paged by (rank, id) descending; highlighted snippets are only
+        built for the rows of the returned page. The category filter includes
+        books of all its descendant categories.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank(Book.search_vector, query, type_=Float).label("rank")
+
+        hits = self.__search_hits(
+            select(
+                Book.id, Book.title, Book.category_id, Book.author_id, Book.publisher_id,
+                Book.published_at, Book.description, Book.rating, rank
+            ),
+            query, author_id, publisher_id, category_id
+        ).subquery("hits")
+
+        page_hits = apply_keyset(select(hits), page, hits.c.rank, hits.c.id, descending=True).subquery("page_hits")
+        snippet = func.ts_headline(
+            SEARCH_CONFIG,
+            func.coalesce(page_hits.c.description, page_hits.c.title),
+            query,
+            "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2",
+        ).label("snippet")
+        statement = (
+            select(page_hits, snippet)
+            .order_by(page_hits.c.rank.desc(), page_hits.c.id.desc())
+        )
+
+        result = await db.execute(statement)
+        rows, next_cursor = next_page(result.all(), page, hits.c.rank, hits.c.id)
+
+        logging.info(f"Found {len(rows)} books matching '{q}'.")
+        return Page(items=rows, next_cursor=next_cursor)
+
+
+    async def search_facets(
+        self, db: AsyncSession, q: str,
+        author_id: Optional[UUID] = None, publisher_id: Optional[UUID] = None, category_id: Optional[UUID] = None
+    ) -> BookFacets:
+        """
+        Facet counts (category, publisher, decade, rating bucket) of all the books matching a search
+        """
+        scope = self.__search_hits(
+            select(Book.category_id, Book.publisher_id, Book.published_at, Book.rating),
+            func.websearch_to_tsquery(SEARCH_CONFIG, q), author_id, publisher_id, category_id
+        )
+        key = ("search", q, author_id, publisher_id, category_id)
+        return await book_facets(db, scope, key)
+
+
+    @staticmethod
+    def __search_hits(statement: Select, query, author_id, publisher_id, category_id) -> Select:
+        statement = statement.where(Book.search_vector.op("@@")(query))
+        if author_id is not None:
+            statement = statement.where(Book.author_id == author_id)
+        if publisher_id is not None:
+            statement = statement.where(Book.publisher_id == publisher_id)
+        if category_id is not None:
+            statement = (
+                statement
+                .join(BookCategoryClosure, Book.category_id == BookCategoryClosure.descendant_id)
+                .where(BookCategoryClosure.ancestor_id == category_id)
+            )
+        return statement
+
+
+    async def stream_all(self, include_names: bool = False) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream every book as batches of rows through a server-side cursor
+
+        Runs on its own session because the response body is produced after the
+        request scoped session has been closed. Only EXPORT_BATCH_SIZE rows are
+        held in memory at a time.
+        """
+        columns = [
+            Book.id, Book.title, Book.category_id, Book.author_id, Book.publisher_id,
+            Book.published_at, Book.description, Book.rating,
+        ]
+        statement = select(*columns)
+        if include_names:
+            statement = (
+                select(
+                    *columns,
+                    Author.name.label("author_name"),
+                    BookPublisher.name.label("publisher_name"),
+                    BookCategory.name.label("category_name"),
+                )
+                .join(Author, Book.author_id == Author.id)
+                .join(BookPublisher, Book.publisher_id == BookPublisher.id)
+                .join(BookCategory, Book.category_id == BookCategory.id)
+            )
+
+        exported = 0
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                exported += len(rows)
+                yield rows
+
+        logging.info(f"Exported {exported} books.")
 
 
     async def get_by_id(
-        self, async_session: AsyncSession, book_id: int
+        self, async_session: AsyncSession, book_id: UUID, fields: Optional[Sequence[str]] = None,
+        include: Sequence[str] = ()
     ):
         """
-        Get book by id
+        Get book by id, only the given columns (and the foreign keys of include) when fields is set
         """
         async with async_session as db:
-            statement = select(Book).filter(Book.id == book_id)
+            foreign_keys = [INCLUDED_RELATIONS[name][0] for name in include]
+            statement = select_fields(Book, fields, *foreign_keys).filter(Book.id == book_id)
             
             result = await db.execute(statement)
-            book = result.scalars().one_or_none()
+            book = (result if fields else result.scalars()).one_or_none()
             
             if not book:
                 logging.warning(f"Book {book_id} not found.")
@@ -97,40 +400,80 @@ class BookCRUD:
 
 
     async def update(
-        self, db: AsyncSession, book_id, data
+        self, db: AsyncSession, book_id: UUID, data: Dict
     ):
         """
-        Update Book by id
-        """
-        statement = select(Book).filter(Book.id == book_id)
-
-        result = await db.execute(statement)
-        book = result.scalars().one_or_none()
+        Update only the given fields of a Book by id with one UPDATE ... RETURNING
 
-        if not book:
-            logging.warning(f"Book {book_id} not found.")
-            raise ObjectNotFoundError("Book", book_id)
+        The previous author, publisher, category and publication date come back
+        from the same statement (a locked subquery of the row before the change)
+        so the counters and stats the book moves away from are adjusted too.
+        """
+        if not data:
+            book = await update_by_id(db, Book, book_id, data)
+            if book is None:
+                logging.warning(f"Book {book_id} not found.")
+                raise ObjectNotFoundError("Book", book_id)
+            return book
 
-        book.title = data["title"]
-        book.author_id = data["author_id"]
-        book.description = data["description"]
-        book.rating = data["rating"]
+        previous = (
+            select(Book.id, Book.author_id, Book.publisher_id, Book.category_id, Book.published_at)
+            .where(Book.id == book_id)
+            .with_for_update()
+            .subquery("previous")
+        )
+        statement = (
+            update(Book)
+            .where(Book.id == previous.c.id)
+            .values(**data)
+            .returning(
+                Book,
+                previous.c.author_id.label("previous_author_id"),
+                previous.c.publisher_id.label("previous_publisher_id"),
+                previous.c.category_id.label("previous_category_id"),
+                previous.c.published_at.label("previous_published_at"),
+            )
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        try:
+            row = (await db.execute(statement)).one_or_none()
+            if row is None:
+                logging.warning(f"Book {book_id} not found.")
+                raise ObjectNotFoundError("Book", book_id)
+            book = row.Book
+            before = SimpleNamespace(
+                author_id=row.previous_author_id, publisher_id=row.previous_publisher_id,
+                category_id=row.previous_category_id, published_at=row.previous_published_at,
+            )
+            # an unchanged author, publisher or category nets to zero and is not written
+            await BookCounts().add(before, -1).add(book).apply(db)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update book {book_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Book", str(e.orig))
 
-        await db.commit()
-        await db.refresh(book)
+        await category_tree_cache.invalidate()
+        facet_cache.clear()
+        catalog_stats.mark_book(before)
+        catalog_stats.mark_book(book)
 
         logging.info(f"Successfully updated book {book_id}.")
         return book
 
 
-    async def delete(self, db: AsyncSession, book: Book):
-        """delete book by id
+    async def delete(self, db: AsyncSession, book_id: UUID):
+        """
+        Delete book by id with one DELETE ... RETURNING
         """
-        await db.delete(book)
+        book = await delete_by_id(db, Book, book_id, Book.author_id, Book.publisher_id, Book.category_id, Book.published_at)
+        if book is None:
+            logging.warning(f"Book {book_id} not found.")
+            raise ObjectNotFoundError("Book", book_id)
+        await BookCounts().add(book, -1).apply(db)
         await db.commit()
-        await db.refresh(book)
+        await category_tree_cache.invalidate()
+        facet_cache.clear()
+        catalog_stats.mark_book(book)
 
-        logging.info(f"Successfully deleted book {book.id}.")
-        return {}
-    
-    
\ No newline at end of file
+        logging.info(f"Successfully deleted book {book_id}.")
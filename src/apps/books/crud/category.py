@@ -1,14 +1,27 @@
 import logging
+from typing import List, Optional
 from uuid import UUID
-from pydantic import ValidationError
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Integer, any_, delete, exists, func, insert, literal, literal_column, not_, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import NoResultFound, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.apps.books.filters import PopularityFilters
 from src.apps.books.exceptions import ObjectCreationError, ObjectNotFoundError, ObjectVerificationError
 from src.apps.books.models.book import Book
-from src.apps.books.models.category import BookCategory
-from src.apps.books.schemas.category import CategoryCreate, CategoryUpdate
+from src.apps.books.models.category import BookCategory, BookCategoryClosure
+from src.apps.books.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
+from src.apps.books.services import catalog_stats, category_tree_cache
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import update_by_id
+
+
+category_tree_adapter = TypeAdapter(List[CategoryRead])
+# pg_advisory_xact_lock key serializing category moves (and inserts under a parent),
+# so two moves cannot each pass the cycle check against the tree before the other
+TREE_LOCK_ID = 0x74726565
 
 
 class CategoryCRUD:
@@ -17,8 +30,14 @@ class CategoryCRUD:
     """ ======================= """
     async def add(self, db: AsyncSession, category: CategoryCreate):
         try:
+            if category.parent_id is not None:
+                # the parent's ancestors are copied, they must not move meanwhile
+                await self.__lock_tree(db)
             db.add(category)
+            await db.flush()
+            await self.__link_closure(db, category.id, category.parent_id)
             await db.commit()
+            await category_tree_cache.invalidate()
             await db.refresh(category)
             
             logging.info(f"Created new category.")
@@ -38,84 +57,317 @@ class CategoryCRUD:
             raise ObjectCreationError(str(e))
 
 
-    async def get_all_tree(self, db: AsyncSession, parent_id=None):
-        stmt = (
-            select(BookCategory)
-            .options(
-                joinedload(BookCategory.books),
-                # joinedload(BookCategory.children)
-            )
-            .filter(BookCategory.parent_id == parent_id)
+    async def get_all(self, db: AsyncSession, page: PageParams, filters: Optional[PopularityFilters] = None):
+        """
+        Get a page of Category objects from db, ordered by (name, id) or (book_count, id)
+        """
+        sort_column = filters.sort_column(BookCategory) if filters else BookCategory.name
+        statement = select(BookCategory)
+        if filters:
+            statement = statement.where(*filters.clauses(BookCategory))
+        page = await paginate(
+            db, statement, page, sort_column, BookCategory.id, filters.descending if filters else False
         )
-        result = await db.execute(stmt)
-        categories = result.unique().scalars().all()
-
-        async def build_tree(cat: BookCategory):
-            # Recursively fetch children from DB
-            child_stmt = (
-                select(BookCategory)
-                .options(joinedload(BookCategory.books))
-                .filter(BookCategory.parent_id == cat.id)
+        
+        logging.info(f"Retrieved {len(page.items)} categories.")
+        return page
+
+
+    async def get_all_tree(self, db: AsyncSession, root_id: Optional[UUID] = None, max_depth: Optional[int] = None):
+        """
+        Get the category hierarchy with its books.
+
+        The subtree is walked by one WITH RECURSIVE query over book_categories and the
+        books of every node are fetched by a second query joined on that CTE, then the
+        tree is assembled in memory in one pass.
+
+        Args:
+            root_id: start from this category instead of all top level categories
+            max_depth: stop descending below this depth (the root is depth 0)
+        """
+        anchor = select(
+            BookCategory.id,
+            BookCategory.name,
+            BookCategory.parent_id,
+            literal_column("0", Integer).label("depth"),
+            array([BookCategory.id]).label("path"),
+        )
+        if root_id is not None:
+            anchor = anchor.where(BookCategory.id == root_id)
+        else:
+            anchor = anchor.where(BookCategory.parent_id.is_(None))
+        tree = anchor.cte("category_tree", recursive=True)
+
+        descendants = (
+            select(
+                BookCategory.id,
+                BookCategory.name,
+                BookCategory.parent_id,
+                tree.c.depth + 1,
+                tree.c.path.op("||")(BookCategory.id),
             )
-            child_result = await db.execute(child_stmt)
-            children = child_result.unique().scalars().all()
-            return {
-                "id": cat.id,
-                "name": cat.name,
-                "parent_id": cat.parent_id,
-                "books": [
-                    {"id": book.id, "title": book.title} for book in cat.books
-                ],
-                "children": [await build_tree(child) for child in children],
+            .join(tree, BookCategory.parent_id == tree.c.id)
+            # the path guard keeps a corrupted (cyclic) hierarchy from recursing forever
+            .where(not_(BookCategory.id == any_(tree.c.path)))
+        )
+        if max_depth is not None:
+            descendants = descendants.where(tree.c.depth < max_depth)
+        tree = tree.union_all(descendants)
+
+        result = await db.execute(
+            select(tree.c.id, tree.c.name, tree.c.parent_id, tree.c.depth)
+            .order_by(tree.c.depth, tree.c.name, tree.c.id)
+        )
+        rows = result.all()
+
+        if root_id is not None and not rows:
+            logging.warning(f"Category with id {root_id} not found.")
+            raise ObjectNotFoundError("Category", root_id)
+
+        nodes = {
+            row.id: {
+                "id": row.id,
+                "name": row.name,
+                "parent_id": row.parent_id,
+                "books": [],
+                "children": [],
             }
+            for row in rows
+        }
 
-        return [await build_tree(cat) for cat in categories]
+        books_result = await db.execute(
+            select(Book.id, Book.title, Book.category_id)
+            .join(tree, Book.category_id == tree.c.id)
+            .order_by(Book.title, Book.id)
+        )
+        for book in books_result.all():
+            nodes[book.category_id]["books"].append({"id": book.id, "title": book.title})
+
+        roots = []
+        for row in rows:
+            parent = nodes.get(row.parent_id) if row.depth > 0 else None
+            if parent is None:
+                roots.append(nodes[row.id])
+            else:
+                parent["children"].append(nodes[row.id])
+
+        logging.info(f"Retrieved category tree of {len(nodes)} categories.")
+        return roots
+
+
+    async def get_tree_json(self, db: AsyncSession, root_id: Optional[UUID] = None, max_depth: Optional[int] = None) -> bytes:
+        """
+        Get the serialized category tree, served from the per-worker cache when
+        the tree has not changed since it was last built
+        """
+        key = (root_id, max_depth)
+        content = category_tree_cache.get(key)
+        if content is not None:
+            return content
+
+        version = category_tree_cache.version
+        categories = await self.get_all_tree(db, root_id, max_depth)
+        tree = category_tree_adapter.validate_python(categories)
+        return category_tree_cache.set(key, version, category_tree_adapter.dump_json(tree))
 
 
     async def get_by_id(self, db: AsyncSession, category_id: UUID):
-        stmt = select(BookCategory).where(BookCategory.id == category_id)
-        result = await db.execute(stmt)
-        return result.scalar_one_or_none()
+        return await get_loader(db, BookCategory).load(category_id)
 
 
     async def get_books_by_id(
-        self, db: AsyncSession, category_id: UUID
+        self, db: AsyncSession, category_id: UUID, page: PageParams,
+        recursive: bool = False, max_depth: Optional[int] = None
     ):
         """
         Get books by category id
+
+        With recursive set, books of every descendant category (down to max_depth
+        levels below this one) are included through the closure table.
         """
         # First check if the category exists
-        category_stmt = select(BookCategory).filter(BookCategory.id == category_id)
-        category_result = await db.execute(category_stmt)
-        category = category_result.scalar_one_or_none()
+        category = await self.get_by_id(db, category_id)
 
         if not category:
             logging.warning(f"Category with id {category_id} not found.")
             raise ObjectNotFoundError("Category", category_id)
         
-        # Author exists, now get books
-        books_stmt = select(Book).filter(Book.category_id == category_id).order_by(Book.id)
-        books_result = await db.execute(books_stmt)
-        books = books_result.scalars().all()
+        # Category exists, now get books
+        statement = select(Book)
+        if recursive:
+            statement = (
+                statement
+                .join(BookCategoryClosure, Book.category_id == BookCategoryClosure.descendant_id)
+                .where(BookCategoryClosure.ancestor_id == category_id)
+            )
+            if max_depth is not None:
+                statement = statement.where(BookCategoryClosure.depth <= max_depth)
+        else:
+            statement = statement.where(Book.category_id == category_id)
+        page = await paginate(db, statement, page, Book.title, Book.id)
         
-        logging.info(f"Retrieved {len(books)} books of category {category_id}.")
-        return books
+        logging.info(f"Retrieved {len(page.items)} books of category {category_id}.")
+        return page
             
 
     async def update(self, db: AsyncSession, category_id: UUID, data: CategoryUpdate):
-        category = await self.get_category(db, category_id)
+        values = data.model_dump(exclude_unset=True)
+        if "parent_id" not in values:
+            return await self.__rename(db, category_id, values)
+
+        # the cycle check below then sees every earlier move
+        await self.__lock_tree(db)
+        category = await self.get_by_id(db, category_id)
         if not category:
-            return None
-        for key, value in data.dict(exclude_unset=True).items():
+            await db.rollback()
+            logging.warning(f"Category {category_id} not found.")
+            raise ObjectNotFoundError("Category", category_id)
+
+        reparent = values["parent_id"] != category.parent_id
+        old_parent_id = category.parent_id
+        if reparent and values["parent_id"] is not None:
+            if await self.__is_in_subtree(db, category_id, values["parent_id"]):
+                await db.rollback()
+                logging.warning(f"Rejected moving category {category_id} under its own subtree.")
+                raise ObjectVerificationError("Category", "a category cannot be moved under itself or its descendants")
+
+        for key, value in values.items():
             setattr(category, key, value)
-        await db.commit()
+        try:
+            await db.flush()
+            if reparent:
+                await self.__move_closure(db, category_id, values["parent_id"])
+            await db.commit()
+            await category_tree_cache.invalidate()
+            if reparent:
+                # the subtree's books move from the old ancestors' counts to the new ones'
+                catalog_stats.mark(category_id=old_parent_id)
+                catalog_stats.mark(category_id=category_id)
+        except IntegrityError as e:
+            logging.error(f"Failed to update category {category_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Category", str(e))
         await db.refresh(category)
+
+        logging.info(f"Successfully updated category {category_id}.")
         return category
 
 
     async def delete(self, db: AsyncSession, category_id: UUID):
-        category = await self.get_category(db, category_id)
-        if category:
-            await db.delete(category)
+        """
+        Delete a category with its whole subtree in one statement, the deleted
+        category (its descendants are not returned)
+
+        Closure rows go with the categories through ON DELETE CASCADE; a subtree
+        still holding books is refused by the books' foreign key.
+        """
+        subtree = select(BookCategoryClosure.descendant_id).where(BookCategoryClosure.ancestor_id == category_id)
+        statement = (
+            delete(BookCategory)
+            .where(BookCategory.id.in_(subtree))
+            .returning(BookCategory.id, BookCategory.name, BookCategory.parent_id, BookCategory.book_count)
+        )
+        try:
+            result = await db.execute(statement)
+            deleted = next((row for row in result.all() if row.id == category_id), None)
+            if deleted is None:
+                await db.rollback()
+                logging.warning(f"Category {category_id} not found.")
+                raise ObjectNotFoundError("Category", category_id)
             await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to delete category {category_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Category", "it or one of its subcategories still has books")
+        await category_tree_cache.invalidate()
+
+        logging.info(f"Successfully deleted category {category_id}.")
+        return deleted
+
+
+    @staticmethod
+    async def __rename(db: AsyncSession, category_id: UUID, values: dict):
+        """Update the fields other than parent_id in one UPDATE ... RETURNING, the hierarchy is untouched"""
+        try:
+            category = await update_by_id(db, BookCategory, category_id, values)
+            if category is None:
+                logging.warning(f"Category {category_id} not found.")
+                raise ObjectNotFoundError("Category", category_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update category {category_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Category", str(e))
+        if values:
+            await category_tree_cache.invalidate()
+
+        logging.info(f"Successfully updated category {category_id}.")
         return category
+
+
+    @staticmethod
+    async def __is_in_subtree(db: AsyncSession, root_id: UUID, category_id: UUID) -> bool:
+        """True when category_id is root_id itself or one of its descendants"""
+        statement = select(
+            exists().where(
+                BookCategoryClosure.ancestor_id == root_id,
+                BookCategoryClosure.descendant_id == category_id,
+            )
+        )
+        result = await db.execute(statement)
+        return result.scalar()
+
+
+    @staticmethod
+    async def __lock_tree(db: AsyncSession):
+        """Serialize closure table changes that depend on existing paths, until commit or rollback"""
+        await db.execute(select(func.pg_advisory_xact_lock(TREE_LOCK_ID)))
+
+
+    @staticmethod
+    async def __link_closure(db: AsyncSession, category_id: UUID, parent_id: Optional[UUID]):
+        """Insert the closure rows of a new leaf category: itself plus every ancestor of its parent"""
+        await db.execute(
+            insert(BookCategoryClosure).values(ancestor_id=category_id, descendant_id=category_id, depth=0)
+        )
+        if parent_id is None:
+            return
+        ancestors = select(
+            BookCategoryClosure.ancestor_id,
+            literal(category_id, BookCategoryClosure.descendant_id.type),
+            BookCategoryClosure.depth + 1,
+        ).where(BookCategoryClosure.descendant_id == parent_id)
+        await db.execute(
+            insert(BookCategoryClosure).from_select(["ancestor_id", "descendant_id", "depth"], ancestors)
+        )
+
+
+    @staticmethod
+    async def __move_closure(db: AsyncSession, category_id: UUID, parent_id: Optional[UUID]):
+        """Re-attach the subtree of category_id under parent_id in the closure table"""
+        subtree = select(BookCategoryClosure.descendant_id).where(BookCategoryClosure.ancestor_id == category_id)
+
+        # drop the links between the subtree and its former ancestors
+        await db.execute(
+            delete(BookCategoryClosure)
+            .where(BookCategoryClosure.descendant_id.in_(subtree))
+            .where(BookCategoryClosure.ancestor_id.not_in(subtree))
+        )
+        if parent_id is None:
+            return
+
+        # link every ancestor of the new parent to every node of the subtree
+        supertree = aliased(BookCategoryClosure)
+        subtree_rows = aliased(BookCategoryClosure)
+        links = (
+            select(
+                supertree.ancestor_id,
+                subtree_rows.descendant_id,
+                supertree.depth + subtree_rows.depth + 1,
+            )
+            .where(supertree.descendant_id == parent_id)
+            .where(subtree_rows.ancestor_id == category_id)
+        )
+        await db.execute(
+            insert(BookCategoryClosure).from_select(["ancestor_id", "descendant_id", "depth"], links)
+        )
@@ -0,0 +1,107 @@
+import logging
+from typing import Dict, List, Tuple
+from sqlalchemy import BigInteger, String, cast, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.books.models import Author, Book, BookCategory, BookPublisher, CatalogChange
+from src.apps.books.schemas.author import AuthorModel
+from src.apps.books.schemas.book import BookModel
+from src.apps.books.schemas.category import CategoryModel
+from src.apps.books.schemas.change import ChangeFeed, ChangeModel, ChangeOp
+from src.apps.books.schemas.publisher import PublisherRead
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, apply_keyset, encode_cursor, next_page
+
+
+# table of a change -> (resource name in the feed, model, schema of its data)
+CHANGE_RESOURCES = {
+    Book.__tablename__: ("book", Book, BookModel),
+    Author.__tablename__: ("author", Author, AuthorModel),
+    BookPublisher.__tablename__: ("publisher", BookPublisher, PublisherRead),
+    BookCategory.__tablename__: ("category", BookCategory, CategoryModel),
+}
+
+
+def change_horizon():
+    """The oldest transaction still running: changes at or after it may not all be visible yet"""
+    return cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String), BigInteger)
+
+
+class ChangeCRUD:
+    """ ======================== """
+    """ Change Feed API Services """
+    """ ======================== """
+    async def get_changes(self, db: AsyncSession, page: PageParams) -> ChangeFeed:
+        """
+        Get the catalog rows changed or deleted after the page.after cursor, oldest first
+
+        Only transactions that finished before the oldest running one are read,
+        so a change committed late can never land behind a cursor already handed
+        out. Each row appears once, with its current content.
+        """
+        statement = select(CatalogChange).where(CatalogChange.txid < change_horizon())
+        statement = apply_keyset(statement, page, CatalogChange.txid, CatalogChange.seq)
+        result = await db.execute(statement)
+        changes, next_cursor = next_page(result.scalars().all(), page, CatalogChange.txid, CatalogChange.seq)
+
+        rows = await self.__load_rows(db, changes)
+        items = []
+        for change in changes:
+            resource, _, schema = CHANGE_RESOURCES[change.table_name]
+            row = rows.get((change.table_name, change.row_id))
+            # a row deleted since its change was logged is reported as deleted; its tombstone follows
+            items.append(ChangeModel(
+                resource=resource,
+                id=change.row_id,
+                op=ChangeOp.upsert if row is not None else ChangeOp.delete,
+                changed_at=change.changed_at,
+                data=schema.model_validate(row).model_dump(mode="json") if row is not None else None,
+            ))
+
+        has_more = next_cursor is not None
+        if not has_more:
+            # caught up: resume after the last change returned, or where the client already was
+            if changes:
+                next_cursor = encode_cursor([changes[-1].txid, changes[-1].seq])
+            else:
+                next_cursor = page.after or encode_cursor([0, 0])
+
+        logging.info(f"Retrieved {len(items)} catalog changes.")
+        return ChangeFeed(items=items, next_cursor=next_cursor, has_more=has_more)
+
+    async def get_cursor(self, db: AsyncSession) -> str:
+        """
+        The cursor of the latest change already readable, i.e. "now" for a client that wants only new changes
+        """
+        statement = (
+            select(CatalogChange.txid, CatalogChange.seq)
+            .where(CatalogChange.txid < change_horizon())
+            .order_by(CatalogChange.txid.desc(), CatalogChange.seq.desc())
+            .limit(1)
+        )
+        result = await db.execute(statement)
+        last = result.one_or_none()
+        return encode_cursor([last.txid, last.seq] if last else [0, 0])
+
+    async def has_pending(self, db: AsyncSession) -> bool:
+        """
+        True when changes are logged at or after the horizon, i.e. committed or
+        still running behind an older open transaction and not readable yet
+        """
+        result = await db.execute(select(exists().where(CatalogChange.txid >= change_horizon())))
+        return result.scalar()
+
+    @staticmethod
+    async def __load_rows(db: AsyncSession, changes: List[CatalogChange]) -> Dict[Tuple[str, object], object]:
+        """The current rows of the upserts, one batched query per table"""
+        ids: Dict[str, list] = {}
+        for change in changes:
+            if change.op == ChangeOp.upsert:
+                ids.setdefault(change.table_name, []).append(change.row_id)
+        rows = {}
+        for table_name, row_ids in ids.items():
+            _, model, _ = CHANGE_RESOURCES[table_name]
+            for row_id, row in zip(row_ids, await get_loader(db, model).load_many(row_ids)):
+                if row is not None:
+                    rows[(table_name, row_id)] = row
+        return rows
@@ -1,13 +1,19 @@
 import logging
-from sqlite3 import IntegrityError
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
 from pydantic import ValidationError
 from sqlalchemy import select
-from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-# from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError
 
 from src.apps.books.models import BookPublisher, Book
+from ..filters import PopularityFilters
 from ..exceptions import ObjectCreationError, ObjectNotFoundError, ObjectVerificationError
+from src.apps.books.services import name_typeahead, upsert_names
+from src.utilities.batch import Batch, get_batch
+from src.utilities.dataloader import get_loader
+from src.utilities.pagination import PageParams, paginate
+from src.utilities.writes import delete_by_id, update_by_id
 
 class PublisherCRUD:
     """ ======================= """
@@ -39,17 +45,41 @@ class PublisherCRUD:
             raise ObjectCreationError(str(e))        
 
 
-    async def get_all(self, db: AsyncSession):
+    async def get_all(self, db: AsyncSession, page: PageParams, filters: Optional[PopularityFilters] = None):
         """
-        Get all Publishers objects from db
+        Get a page of Publishers objects from db, ordered by (name, id) or (book_count, id)
         """
-        statement = select(BookPublisher).order_by(BookPublisher.id)
-
-        result = await db.execute(statement)
-        publishers = result.scalars().all()
+        sort_column = filters.sort_column(BookPublisher) if filters else BookPublisher.name
+        statement = select(BookPublisher)
+        if filters:
+            statement = statement.where(*filters.clauses(BookPublisher))
+        page = await paginate(
+            db, statement, page, sort_column, BookPublisher.id, filters.descending if filters else False
+        )
         
-        logging.info(f"Retrieved {len(publishers)} publishers.")
-        return publishers
+        logging.info(f"Retrieved {len(page.items)} publishers.")
+        return page
+
+
+    async def typeahead(self, db: AsyncSession, q: str, limit: int = 10) -> bytes:
+        """
+        Get the closest publisher names to q (prefix first, then fuzzy) as JSON
+        """
+        return await name_typeahead(db, BookPublisher, q, limit)
+
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[UUID], fields: Optional[Sequence[str]] = None) -> Batch:
+        """
+        Get publishers by a list of ids in one query, in the order of ids, with the ids not found
+        """
+        return await get_batch(db, BookPublisher, ids, fields)
+
+
+    async def bulk_upsert(self, db: AsyncSession, names: List[str]):
+        """
+        Create the missing publishers and get the ids of all names in one statement
+        """
+        return await upsert_names(db, BookPublisher, names)
 
 
     async def get_by_id(
@@ -58,15 +88,13 @@ class PublisherCRUD:
         """
         Get publisher by id
         """
-        try:
-            statement = select(BookPublisher).filter(BookPublisher.id == publisher_id)
-            result = await db.execute(statement)           
-            publisher = result.scalars().one()
-            logging.info(f"Retrieved publisher {publisher_id}.")
-            return publisher
-        except NoResultFound:
+        publisher = await get_loader(db, BookPublisher).load(publisher_id)
+
+        if publisher is None:
             logging.warning(f"Publisher with id {publisher_id} not found.")
             raise ObjectNotFoundError("Book publisher", publisher_id)
+        logging.info(f"Retrieved publisher {publisher_id}.")
+        return publisher
             
         
     async def get_books_by_id(
@@ -76,9 +104,7 @@ class PublisherCRUD:
         Get publisher by id
         """
         # First check if the publisher exists
-        publisher_stmt = select(BookPublisher).filter(BookPublisher.id == publisher_id)
-        publisher_result = await db.execute(publisher_stmt)
-        publisher = publisher_result.scalar_one_or_none()
+        publisher = await get_loader(db, BookPublisher).load(publisher_id)
 
         if not publisher:
             logging.warning(f"Publisher with id {publisher_id} not found.")
@@ -94,36 +120,40 @@ class PublisherCRUD:
             
 
     async def update(
-        self, db: AsyncSession, publisher_id, data
+        self, db: AsyncSession, publisher_id: UUID, data: Dict
     ):
         """
-        Update Publisher by id
+        Update only the given fields of a Publisher by id with one UPDATE ... RETURNING
         """
-        statement = select(BookPublisher).filter(BookPublisher.id == publisher_id)
-
-        result = await db.execute(statement)
-        publisher = result.scalars().scalar_one_or_none()
-
-        if not publisher:
-            logging.warning(f"Publisher {publisher_id} not found.")
-            raise ObjectNotFoundError("Book publisher", publisher_id)
-        
-        publisher.name = data["name"]
-
-        await db.commit()
-        await db.refresh(publisher)
+        try:
+            publisher = await update_by_id(db, BookPublisher, publisher_id, data)
+            if publisher is None:
+                logging.warning(f"Publisher {publisher_id} not found.")
+                raise ObjectNotFoundError("Book publisher", publisher_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to update publisher {publisher_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Book publisher", str(e.orig))
 
         logging.info(f"Successfully updated publisher {publisher_id}.")
         return publisher
 
 
-    async def delete(self, db: AsyncSession, publisher: BookPublisher):
-        """delete publisher by id
+    async def delete(self, db: AsyncSession, publisher_id: UUID):
         """
-        await db.delete(publisher)
-        await db.commit()
-        await db.refresh(publisher)
+        Delete publisher by id with one DELETE ... RETURNING, refused while books refer to it
+        """
+        try:
+            publisher = await delete_by_id(db, BookPublisher, publisher_id, BookPublisher.name, BookPublisher.book_count)
+            if publisher is None:
+                logging.warning(f"Publisher {publisher_id} not found.")
+                raise ObjectNotFoundError("Book publisher", publisher_id)
+            await db.commit()
+        except IntegrityError as e:
+            logging.error(f"Failed to delete publisher {publisher_id}. Error: {str(e)}")
+            await db.rollback()
+            raise ObjectVerificationError("Book publisher", "it still has books")
 
-        logging.info(f"Successfully deleted publisher {publisher.id}.")
-        return {}
-       
\ No newline at end of file
+        logging.info(f"Successfully deleted publisher {publisher_id}.")
+        return publisher
@@ -0,0 +1,85 @@
+import logging
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.books.models import Author, BookCategory, BookPublisher
+from src.apps.books.models.stats import AuthorStats, CategoryStats, PublisherStats, YearStats
+from src.utilities.pagination import Page, PageParams, paginate
+
+
+class StatsCRUD:
+    """ =========================== """
+    """ Catalog Statistics Services """
+    """ =========================== """
+    # every query reads the precomputed book_stats_* rows, never counts books
+    async def get_categories(self, db: AsyncSession, page: PageParams, parent_id: Optional[UUID] = None) -> Page:
+        """
+        Get a page of category stats, most books (including subcategories) first
+        """
+        statement = (
+            select(
+                CategoryStats.category_id, BookCategory.name, BookCategory.parent_id,
+                CategoryStats.book_count, CategoryStats.subtree_book_count, CategoryStats.refreshed_at,
+            )
+            .join(BookCategory, BookCategory.id == CategoryStats.category_id)
+            .where(CategoryStats.subtree_book_count > 0)
+        )
+        if parent_id is not None:
+            statement = statement.where(BookCategory.parent_id == parent_id)
+        page = await paginate(
+            db, statement, page, CategoryStats.subtree_book_count, CategoryStats.category_id, descending=True
+        )
+
+        logging.info(f"Retrieved stats of {len(page.items)} categories.")
+        return page
+
+
+    async def get_authors(self, db: AsyncSession, page: PageParams) -> Page:
+        """
+        Get a page of author stats, most books first
+        """
+        page = await self.__owner_page(db, page, AuthorStats, AuthorStats.author_id, Author)
+
+        logging.info(f"Retrieved stats of {len(page.items)} authors.")
+        return page
+
+
+    async def get_publishers(self, db: AsyncSession, page: PageParams) -> Page:
+        """
+        Get a page of publisher stats, most books first
+        """
+        page = await self.__owner_page(db, page, PublisherStats, PublisherStats.publisher_id, BookPublisher)
+
+        logging.info(f"Retrieved stats of {len(page.items)} publishers.")
+        return page
+
+
+    async def get_years(
+        self, db: AsyncSession, year_from: Optional[int] = None, year_to: Optional[int] = None
+    ) -> List[YearStats]:
+        """
+        Get the number of books published per year, in year order
+        """
+        statement = select(YearStats).order_by(YearStats.year)
+        if year_from is not None:
+            statement = statement.where(YearStats.year >= year_from)
+        if year_to is not None:
+            statement = statement.where(YearStats.year <= year_to)
+        result = await db.execute(statement)
+        years = result.scalars().all()
+
+        logging.info(f"Retrieved stats of {len(years)} years.")
+        return years
+
+
+    @staticmethod
+    async def __owner_page(db: AsyncSession, page: PageParams, stats, stats_key, owner) -> Page:
+        average_rating = (cast(stats.rating_sum, Float) / func.nullif(stats.book_count, 0, type_=Float)).label("average_rating")
+        statement = (
+            select(stats_key, owner.name, stats.book_count, average_rating, stats.refreshed_at)
+            .join(owner, owner.id == stats_key)
+            .where(stats.book_count > 0)
+        )
+        return await paginate(db, statement, page, stats.book_count, stats_key, descending=True)
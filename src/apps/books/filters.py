@@ -0,0 +1,151 @@
+from datetime import date
+from enum import StrEnum
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+
+from src.apps.books.models.book import Book
+from src.utilities.sql import any_of, starts_with
+
+
+class InvalidFilterError(HTTPException):
+    def __init__(self, message: str):
+        super().__init__(status_code=400, detail=message)
+
+
+class BookSort(StrEnum):
+    title = "title"
+    title_desc = "-title"
+    rating = "rating"
+    rating_desc = "-rating"
+    published_at = "published_at"
+    published_at_desc = "-published_at"
+
+
+# every sort key is paired with id in the same direction, so one (..., key, id)
+# index serves it both ways (backward scan for descending)
+BOOK_SORT_COLUMNS = {
+    "title": Book.title,
+    "rating": Book.rating,
+    "published_at": Book.published_at,
+}
+
+
+class BookFilters:
+    """Whitelisted filters and sort order of book listings
+
+    Equality filters on author, publisher or category combined with any sort key
+    map onto one of the (foreign_key, sort_key, id) indexes; ranges on the sort
+    key narrow the same index scan. Everything is bound as query parameters.
+    """
+    def __init__(
+        self,
+        rating_min: Optional[int] = Query(None, ge=0, le=100, description="Minimum rating (inclusive)"),
+        rating_max: Optional[int] = Query(None, ge=0, le=100, description="Maximum rating (inclusive)"),
+        published_from: Optional[date] = Query(None, description="Published on or after this date"),
+        published_to: Optional[date] = Query(None, description="Published on or before this date"),
+        author_id: Optional[List[UUID]] = Query(None, description="Only books of these authors"),
+        publisher_id: Optional[List[UUID]] = Query(None, description="Only books of these publishers"),
+        category_id: Optional[List[UUID]] = Query(None, description="Only books directly in these categories"),
+        title_prefix: Optional[str] = Query(None, min_length=1, max_length=100, description="Title starts with (case sensitive)"),
+        sort: BookSort = Query(BookSort.title, description="Sort key, prefixed with - for descending"),
+    ):
+        if rating_min is not None and rating_max is not None and rating_min > rating_max:
+            raise InvalidFilterError("rating_min must not be greater than rating_max")
+        if published_from is not None and published_to is not None and published_from > published_to:
+            raise InvalidFilterError("published_from must not be after published_to")
+        self.rating_min = rating_min
+        self.rating_max = rating_max
+        self.published_from = published_from
+        self.published_to = published_to
+        self.author_id = author_id
+        self.publisher_id = publisher_id
+        self.category_id = category_id
+        self.title_prefix = title_prefix
+        self.sort = sort
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+    @property
+    def sort_column(self):
+        return BOOK_SORT_COLUMNS[self.sort.lstrip("-")]
+
+    def clauses(self) -> list:
+        """The WHERE clauses of the requested filters"""
+        clauses = []
+        if self.rating_min is not None:
+            clauses.append(Book.rating >= self.rating_min)
+        if self.rating_max is not None:
+            clauses.append(Book.rating <= self.rating_max)
+        if self.published_from is not None:
+            clauses.append(Book.published_at >= self.published_from)
+        if self.published_to is not None:
+            clauses.append(Book.published_at <= self.published_to)
+        for column, ids in (
+            (Book.author_id, self.author_id),
+            (Book.publisher_id, self.publisher_id),
+            (Book.category_id, self.category_id),
+        ):
+            if ids:
+                clauses.append(column == ids[0] if len(ids) == 1 else any_of(column, ids))
+        if self.title_prefix is not None:
+            # a range the text_pattern_ops index on title serves in any plan
+            clauses.append(starts_with(Book.title, self.title_prefix))
+        return clauses
+
+    @property
+    def key(self) -> Tuple:
+        """The filter values (not the sort order), usable as a cache key"""
+        return (
+            self.rating_min, self.rating_max, self.published_from, self.published_to,
+            tuple(sorted(self.author_id or ())), tuple(sorted(self.publisher_id or ())),
+            tuple(sorted(self.category_id or ())), self.title_prefix,
+        )
+
+    @property
+    def filtered(self) -> bool:
+        return any(value not in (None, ()) for value in self.key)
+
+
+class PopularitySort(StrEnum):
+    name = "name"
+    name_desc = "-name"
+    book_count = "book_count"
+    book_count_desc = "-book_count"
+
+
+class PopularityFilters:
+    """Book count filter and sort order of author, publisher and category listings
+
+    book_count is a denormalized column, so both map onto the (book_count, id)
+    or (name, id) index of the listed table without counting any books.
+    """
+    def __init__(
+        self,
+        min_books: Optional[int] = Query(None, ge=0, description="Minimum number of books (inclusive)"),
+        max_books: Optional[int] = Query(None, ge=0, description="Maximum number of books (inclusive)"),
+        sort: PopularitySort = Query(PopularitySort.name, description="Sort key, prefixed with - for descending"),
+    ):
+        if min_books is not None and max_books is not None and min_books > max_books:
+            raise InvalidFilterError("min_books must not be greater than max_books")
+        self.min_books = min_books
+        self.max_books = max_books
+        self.sort = sort
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+    def sort_column(self, model):
+        return getattr(model, self.sort.lstrip("-"))
+
+    def clauses(self, model) -> list:
+        clauses = []
+        if self.min_books is not None:
+            clauses.append(model.book_count >= self.min_books)
+        if self.max_books is not None:
+            clauses.append(model.book_count <= self.max_books)
+        return clauses
@@ -1,4 +1,6 @@
 from .author import Author
 from .book import Book
 from .publisher import BookPublisher
-from .category import BookCategory
\ No newline at end of file
+from .category import BookCategory, BookCategoryClosure
+from .stats import AuthorStats, CategoryStats, PublisherStats, YearStats
+from .change import CatalogChange
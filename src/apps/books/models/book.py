@@ -1,13 +1,34 @@
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, Date, String, Integer, ForeignKey
-from sqlalchemy.orm import relationship 
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy import Column, Computed, Index, Date, String, Integer, ForeignKey
+from sqlalchemy.orm import deferred, relationship 
 
 from src.core.database import Base
+from src.common.mixins import Timestamp
 from src.apps.books.models import Author
-    
-class Book(Base):
+
+
+SEARCH_CONFIG = 'english'
+
+class Book(Timestamp, Base):
     __tablename__: str = 'books'
+    __table_args__ = (
+        Index('ix_books_title_id', 'title', 'id'),
+        Index('ix_books_category_id_title_id', 'category_id', 'title', 'id'),
+        # filter/sort combinations of book listings: (foreign key, sort key, id)
+        Index('ix_books_rating_id', 'rating', 'id'),
+        Index('ix_books_published_at_id', 'published_at', 'id'),
+        Index('ix_books_category_id_rating_id', 'category_id', 'rating', 'id'),
+        Index('ix_books_category_id_published_at_id', 'category_id', 'published_at', 'id'),
+        Index('ix_books_author_id_title_id', 'author_id', 'title', 'id'),
+        Index('ix_books_author_id_rating_id', 'author_id', 'rating', 'id'),
+        Index('ix_books_author_id_published_at_id', 'author_id', 'published_at', 'id'),
+        Index('ix_books_publisher_id_title_id', 'publisher_id', 'title', 'id'),
+        Index('ix_books_publisher_id_rating_id', 'publisher_id', 'rating', 'id'),
+        Index('ix_books_publisher_id_published_at_id', 'publisher_id', 'published_at', 'id'),
+        Index('ix_books_title_pattern', 'title', postgresql_ops={'title': 'text_pattern_ops'}),
+        Index('ix_books_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False, unique=True)
@@ -17,6 +38,12 @@ class Book(Base):
     published_at = Column(Date, nullable=True)
     description = Column(String)
     rating = Column(Integer, nullable=False)
+    # title weighs more than description in ts_rank; deferred so listings never load it
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True
+    )))
     
     category = relationship("BookCategory", back_populates="books")
     publisher = relationship("BookPublisher", back_populates="books")
@@ -1,20 +1,43 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship 
 
 from src.core.database import Base
+from src.common.mixins import Timestamp
 from src.apps.books.models import Book
 
 
-class BookCategory(Base):
+class BookCategory(Timestamp, Base):
     __tablename__ = 'book_categories'
+    __table_args__ = (
+        Index('ix_book_categories_name_id', 'name', 'id'),
+        Index('ix_book_categories_book_count_id', 'book_count', 'id'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     parent_id = Column(UUID(as_uuid=True), ForeignKey('book_categories.id'), nullable=True)
+    # books directly in this category, maintained by BookCRUD in the transaction of every book write
+    book_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     parent = relationship("BookCategory", remote_side=[id], back_populates="children")
     children = relationship("BookCategory", back_populates="parent", cascade="all, delete")
 
     books = relationship("Book", back_populates="category")
+
+
+class BookCategoryClosure(Base):
+    """Ancestor/descendant pairs of the category hierarchy (closure table)
+
+    Every category has a row pointing at itself with depth 0, plus one row per
+    ancestor with the distance to it. Kept in sync by CategoryCRUD.
+    """
+    __tablename__ = 'book_category_closure'
+    __table_args__ = (
+        Index('ix_book_category_closure_descendant_depth', 'descendant_id', 'depth'),
+    )
+
+    ancestor_id = Column(UUID(as_uuid=True), ForeignKey('book_categories.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = Column(UUID(as_uuid=True), ForeignKey('book_categories.id', ondelete='CASCADE'), primary_key=True)
+    depth = Column(Integer, nullable=False)
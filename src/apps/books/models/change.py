@@ -0,0 +1,32 @@
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, DateTime, Index, Sequence, String, UniqueConstraint
+
+from src.core.database import Base
+from src.common.mixins import utc_now
+
+
+CHANGE_SEQUENCE = Sequence('catalog_changes_seq')
+
+
+class CatalogChange(Base):
+    """Latest change of every catalog row, written by the record_catalog_change trigger
+
+    One row per (table_name, row_id): a later write to the same row replaces
+    the entry with a new (txid, seq), so the log grows with the number of rows,
+    not of writes. Deletes leave their entry behind as a tombstone (op 'delete').
+    txid is the id of the writing transaction; ordering by (txid, seq) and only
+    reading transactions older than every running one gives a cursor that never
+    skips a change committed late.
+    """
+    __tablename__ = 'catalog_changes'
+    __table_args__ = (
+        UniqueConstraint('table_name', 'row_id', name='uq_catalog_changes_table_name_row_id'),
+        Index('ix_catalog_changes_txid_seq', 'txid', 'seq'),
+    )
+
+    seq = Column(BigInteger, CHANGE_SEQUENCE, primary_key=True, server_default=CHANGE_SEQUENCE.next_value())
+    txid = Column(BigInteger, nullable=False)
+    table_name = Column(String, nullable=False)
+    row_id = Column(UUID(as_uuid=True), nullable=False)
+    op = Column(String, nullable=False)
+    changed_at = Column(DateTime, server_default=utc_now(), nullable=False)
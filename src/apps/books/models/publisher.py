@@ -1,17 +1,25 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Index, Integer, String
 from sqlalchemy.orm import relationship 
 
 from src.core.database import Base
+from src.common.mixins import Timestamp
 from src.apps.books.models import Book
 
 
-class BookPublisher(Base):
+class BookPublisher(Timestamp, Base):
     __tablename__ = 'book_publishers'
+    __table_args__ = (
+        Index('ix_book_publishers_name_id', 'name', 'id'),
+        Index('ix_book_publishers_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_book_publishers_book_count_id', 'book_count', 'id'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, unique=True)
+    # maintained by BookCRUD in the transaction of every book write
+    book_count = Column(Integer, nullable=False, default=0, server_default='0')
 
 
     books = relationship("Book", back_populates="publisher")
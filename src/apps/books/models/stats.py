@@ -0,0 +1,54 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer
+
+from src.core.database import Base
+
+
+class CategoryStats(Base):
+    """Books per category, directly and including all subcategories
+
+    Like the other *Stats tables it is precomputed by CatalogStatsRefresher,
+    never written by request handlers.
+    """
+    __tablename__ = 'book_stats_category'
+    __table_args__ = (
+        Index('ix_book_stats_category_subtree_count_id', 'subtree_book_count', 'category_id'),
+    )
+
+    category_id = Column(UUID(as_uuid=True), ForeignKey('book_categories.id', ondelete='CASCADE'), primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    subtree_book_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class AuthorStats(Base):
+    __tablename__ = 'book_stats_author'
+    __table_args__ = (
+        Index('ix_book_stats_author_book_count_id', 'book_count', 'author_id'),
+    )
+
+    author_id = Column(UUID(as_uuid=True), ForeignKey('book_authors.id', ondelete='CASCADE'), primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(BigInteger, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PublisherStats(Base):
+    __tablename__ = 'book_stats_publisher'
+    __table_args__ = (
+        Index('ix_book_stats_publisher_book_count_id', 'book_count', 'publisher_id'),
+    )
+
+    publisher_id = Column(UUID(as_uuid=True), ForeignKey('book_publishers.id', ondelete='CASCADE'), primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(BigInteger, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class YearStats(Base):
+    __tablename__ = 'book_stats_year'
+
+    year = Column(Integer, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
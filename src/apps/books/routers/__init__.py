@@ -1,4 +1,6 @@
 from .author import routers as author_routers
 from .book import routers as book_routers
 from .category import routers as category_routers
-from .publisher import routers as publisher_routers
\ No newline at end of file
+from .publisher import routers as publisher_routers
+from .stats import routers as stats_routers
+from .changes import routers as change_routers
\ No newline at end of file
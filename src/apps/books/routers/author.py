@@ -1,11 +1,21 @@
 from http import HTTPStatus
 from typing import List
-from fastapi import APIRouter, Path
+from uuid import UUID
+from fastapi import APIRouter, Path, Query, Response
 
 from src.apps.books.crud import AuthorCRUD
 from src.apps.books.models import Author
-from ..schemas.author import AuthorCreateModel, AuthorModel
+from ..schemas.author import AuthorCreateModel, AuthorModel, AuthorUpdateModel
+from ..schemas.bulk import NameIdMapping, NamesBatch
+from ..schemas.suggestion import NameSuggestion
+from src.apps.books.services import TYPEAHEAD_TTL
+from src.utilities.batch import Batch, BatchRequest
+from src.utilities.pagination import Page
+from src.api.dependencies.batch import BatchIds
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.fieldsets import AuthorFields
+from src.api.dependencies.filters import PopularityFilter
+from src.api.dependencies.pagination import Pagination
 
 
 """ ======================= """
@@ -31,29 +41,88 @@ async def create_author(db: AsyncDbSession, author_data: AuthorCreateModel):
     return author
 
 
-@routers.get("", response_model=List[AuthorModel])
-async def get_all_authors(db: AsyncDbSession):
-    """API endpoint for listing all author resources
+@routers.get("", response_model=Page[AuthorModel])
+async def get_all_authors(db: AsyncDbSession, page: Pagination, filters: PopularityFilter, fields: AuthorFields, ids: BatchIds):
+    """API endpoint for listing author resources, one keyset page at a time
+
+    With `?fields=id,name` only those columns are read and returned. With
+    `?ids=` those authors are returned instead of a page, shaped as the
+    POST /batch response.
+
+    `min_books`/`max_books` and `sort=-book_count` use the denormalized
+    book_count, no books are counted.
     """
-    authors = await author_services.get_all(db)
-    return authors
+    if ids is not None:
+        authors = await author_services.get_many(db, ids, fields.names)
+        return fields.respond(authors, Batch)
+    authors = await author_services.get_all(db, page, fields.names, filters)
+    return fields.render(authors, Page)
 
 
-@routers.get("/{author_id}")
-async def get_author_by_id(db: AsyncDbSession, 
-    author_id: int = Path(..., description="The author id, you want to find: ", gt=0),
+@routers.post("/batch", response_model=Batch[AuthorModel])
+async def get_authors_batch(db: AsyncDbSession, data: BatchRequest):
+    """API endpoint for fetching many authors by id at once
+
+    Args:
+        data (BatchRequest): the author ids, at most MAX_BATCH_SIZE
+
+    Returns:
+        dict: the authors found, in the order of the ids, and the ids not found
+    """
+    return await author_services.get_many(db, data.ids)
+
+
+@routers.post("/bulk", response_model=List[NameIdMapping])
+async def bulk_upsert_authors(db: AsyncDbSession, data: NamesBatch):
+    """API endpoint for resolving many author names to ids in one round trip
+
+    Args:
+        data (NamesBatch): the author names, missing ones are created
+
+    Returns:
+        list: id, name and whether it was created, one per input name in input order
+    """
+    return await author_services.bulk_upsert(db, data.names)
+
+
+@routers.get("/typeahead", response_model=List[NameSuggestion])
+async def author_typeahead(db: AsyncDbSession,
+    q: str = Query(..., min_length=1, max_length=100, description="What has been typed so far"),
+    limit: int = Query(10, ge=1, le=25, description="Maximum number of suggestions"),
+):
+    """API endpoint for author name autocomplete
+
+    Args:
+        q (str): the partial name
+        limit (int): how many suggestions to return
+
+    Returns:
+        list: id and name of the best matching authors
+    """
+    content = await author_services.typeahead(db, q, limit)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={TYPEAHEAD_TTL}"}
+    )
+
+
+@routers.get("/{author_id}", response_model=AuthorModel)
+async def get_author_by_id(db: AsyncDbSession, fields: AuthorFields,
+    author_id: UUID = Path(..., description="The author id, you want to find: "),
     # query_param: str = Query(None, max_length=5)
 ):
     """API endpoint for retrieving a author by its ID
 
     Args:
-        author_id (int): the ID of the author to retrieve
+        author_id (UUID): the ID of the author to retrieve
+        fields (str): optional comma separated subset of the author fields
 
     Returns:
         dict: The retrieved author
     """
-    author = await author_services.get_by_id(db, author_id)
-    return author
+    author = await author_services.get_by_id(db, author_id, fields.names)
+    return fields.render(author)
 
 
 @routers.get("/{author_id}/roles")
@@ -90,38 +159,27 @@ async def get_permissions_by_author_id(db: AsyncDbSession,
     return permissions
 
 
-@routers.patch("/{author_id}")
-async def update_author(db: AsyncDbSession, data: AuthorCreateModel, 
-                      author_id: int = Path(..., description="The author id, you want to update: ")):
+@routers.patch("/{author_id}", response_model=AuthorModel)
+async def update_author(db: AsyncDbSession, data: AuthorUpdateModel, 
+                      author_id: UUID = Path(..., description="The author id, you want to update: ")):
     """Update by ID
 
     Args:
-        author_id (int): ID of author to update
-        data (AuthorCreateModel): data to update author
+        author_id (UUID): ID of author to update
+        data (AuthorUpdateModel): the fields to change, the others are left as they are
 
     Returns:
         dict: the updated author
     """
-    author = await author_services.update(
-        db, 
-        author_id, 
-        data={
-            "title": data.title, 
-            "author_id": data.author_id, 
-            "description": data.description, 
-            "rating": data.rating
-        }
-    )
+    author = await author_services.update(db, author_id, data.model_dump(exclude_unset=True))
     return author
 
 
 @routers.delete("/{author_id}", status_code=HTTPStatus.NO_CONTENT)
-async def delete_author(db: AsyncDbSession, author_id: int = Path(..., description="The author id, you want to delete: ")) -> None:
+async def delete_author(db: AsyncDbSession, author_id: UUID = Path(..., description="The author id, you want to delete: ")) -> None:
     """Delete author by id
 
     Args:
-        author_id (str): ID of author to delete
+        author_id (UUID): ID of author to delete
     """
-    author = await author_services.get_by_id(db, author_id)
-    result = await author_services.delete(db, author)
-    return result
+    await author_services.delete(db, author_id)
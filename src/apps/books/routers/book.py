@@ -1,11 +1,23 @@
 from http import HTTPStatus
-from typing import List
-from fastapi import APIRouter, Path
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Path, Query, Request
+from fastapi.responses import StreamingResponse
 
 from src.apps.books.crud import BookCRUD
 from src.apps.books.models import Book
-from src.apps.books.schemas import BookCreateModel, BookModel
+from src.apps.books.schemas import (
+    BookCreateModel, BookDocument, BookImportReport, BookIncluded, BookModel, BookPage, BookSearchPage,
+    BookSearchResult, BookUpdateModel
+)
+from src.apps.books.services import CATALOG_MEDIA_TYPES, CatalogFormat, decode_import, encode_export
+from src.utilities.batch import Batch, BatchRequest
+from src.utilities.pagination import Page
+from src.api.dependencies.batch import BatchIds
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.filters import BookFilter
+from src.api.dependencies.fieldsets import BookFields, BookIncludes
+from src.api.dependencies.pagination import Pagination
 
 
 """ ===================== """
@@ -37,63 +49,169 @@ async def create_book(db: AsyncDbSession, book_data: BookCreateModel):
     return BookModel.model_validate(book)
 
 
-@routers.get("", response_model=List[BookModel])
-async def get_all_books(db: AsyncDbSession):
-    """API endpoint for listing all book resources
+@routers.get("", response_model=BookPage)
+async def get_all_books(db: AsyncDbSession, page: Pagination, filters: BookFilter,
+    fields: BookFields, include: BookIncludes, ids: BatchIds,
+    facets: bool = Query(False, description="Add category, publisher, decade and rating counts of all the matching books"),
+):
+    """API endpoint for listing book resources, one keyset page at a time
+
+    With `?fields=id,title` only those columns are read and returned. With
+    `?include=author,publisher` the referenced objects are added once each
+    under `included`. With `?ids=` those books are returned instead of a page,
+    shaped as the POST /batch response.
+
+    Filters (rating and publication date ranges, author/publisher/category ids,
+    title prefix) and `sort` (title, rating or published_at, `-` for descending)
+    apply to pages; undated books sort after dated ones (before them for
+    `-published_at`). With `?facets=true` the page carries the counts of every
+    matching book per category, publisher, decade and rating bucket.
+    """
+    if ids is not None:
+        books = await book_services.get_many(db, ids, fields.names, include)
+    else:
+        books = await book_services.get_all(db, page, fields.names, include, filters)
+    included = None
+    if include:
+        related = await book_services.get_included(db, books.items, include)
+        included = BookIncluded.model_validate(related, from_attributes=True)
+    if ids is not None:
+        return fields.respond(books, Batch, included=included)
+    facet_counts = await book_services.get_facets(db, filters) if facets else None
+    return fields.render(books, Page, included=included, facets=facet_counts)
+
+
+@routers.post("/batch", response_model=Batch[BookModel])
+async def get_books_batch(db: AsyncDbSession, data: BatchRequest):
+    """API endpoint for fetching many books by id at once
+
+    Args:
+        data (BatchRequest): the book ids, at most MAX_BATCH_SIZE
+
+    Returns:
+        dict: the books found, in the order of the ids, and the ids not found
+    """
+    return await book_services.get_many(db, data.ids)
+
+
+@routers.post("/import", response_model=BookImportReport, openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {media_type: {"schema": {"type": "string"}} for media_type in CATALOG_MEDIA_TYPES.values()},
+    }
+})
+async def import_books(request: Request, db: AsyncDbSession,
+    format: CatalogFormat = Query(CatalogFormat.ndjson, description="ndjson or csv (with a header line)"),
+):
+    """API endpoint for creating many books from one NDJSON or CSV upload
+
+    The body is read as a stream and loaded in chunks; every record uses the
+    BookCreateModel fields.
+
+    Args:
+        format (CatalogFormat): format of the request body
+
+    Returns:
+        dict: counts of received and inserted rows and the errors of each rejected row
+    """
+    records = decode_import(request.stream(), format)
+    return await book_services.bulk_import(db, records)
+
+
+@routers.get("/search", response_model=BookSearchPage)
+async def search_books(db: AsyncDbSession, page: Pagination,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms, web search syntax (\"quoted phrase\", or, -exclude)"),
+    author_id: Optional[UUID] = Query(None, description="Only books of this author"),
+    publisher_id: Optional[UUID] = Query(None, description="Only books of this publisher"),
+    category_id: Optional[UUID] = Query(None, description="Only books of this category or its subcategories"),
+    facets: bool = Query(False, description="Add category, publisher, decade and rating counts of all the matches"),
+):
+    """API endpoint for full-text search over book titles and descriptions
+
+    Args:
+        q (str): the search terms
+        facets (bool): count all the matches per category, publisher, decade and rating bucket
+
+    Returns:
+        dict: A page of matching books, best ranked first, with highlighted snippets
+    """
+    hits = await book_services.search(db, q, page, author_id, publisher_id, category_id)
+    return BookSearchPage(
+        items=[BookSearchResult.model_validate(h) for h in hits.items],
+        next_cursor=hits.next_cursor,
+        facets=await book_services.search_facets(db, q, author_id, publisher_id, category_id) if facets else None
+    )
+
+
+@routers.get("/export", response_class=StreamingResponse)
+async def export_books(
+    format: CatalogFormat = Query(CatalogFormat.ndjson, description="ndjson or csv"),
+    include_names: bool = Query(False, description="Add author, publisher and category names"),
+):
+    """API endpoint for exporting the whole book catalog
+
+    The catalog is streamed from a server-side cursor in batches, so memory use
+    does not grow with the number of books.
+
+    Args:
+        format (CatalogFormat): output format, ndjson or csv
+        include_names (bool): join author, publisher and category names
+
+    Returns:
+        StreamingResponse: the catalog as an attachment
     """
-    books = await book_services.get_all(db)
-    return [BookModel.model_validate(b) for b in books]
+    batches = book_services.stream_all(include_names)
+    return StreamingResponse(
+        encode_export(batches, format),
+        media_type=CATALOG_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'}
+    )
 
 
-@routers.get("/{book_id}")
-async def get_book_by_id(db: AsyncDbSession, 
-    book_id: int = Path(..., description="The book id, you want to find: ", gt=0),
+@routers.get("/{book_id}", response_model=BookDocument)
+async def get_book_by_id(db: AsyncDbSession, fields: BookFields, include: BookIncludes,
+    book_id: UUID = Path(..., description="The book id, you want to find: "),
     # query_param: str = Query(None, max_length=5)
 ):
     """API endpoint for retrieving a book by its ID
 
     Args:
-        book_id (int): the ID of the book to retrieve
+        book_id (UUID): the ID of the book to retrieve
+        fields (str): optional comma separated subset of the book fields
+        include (str): optional comma separated related objects to add under `included`
 
     Returns:
         dict: The retrieved book
     """
-    book = await book_services.get_by_id(db, book_id)
-    return book
+    book = await book_services.get_by_id(db, book_id, fields.names, include)
+    included = None
+    if include:
+        related = await book_services.get_included(db, [book], include)
+        included = BookIncluded.model_validate(related, from_attributes=True)
+    return fields.render(book, included=included)
 
 
-@routers.patch("/{book_id}")
-async def update_book(db: AsyncDbSession, data: BookCreateModel, 
-                      book_id: int = Path(..., description="The book id, you want to update: ")):
+@routers.patch("/{book_id}", response_model=BookModel)
+async def update_book(db: AsyncDbSession, data: BookUpdateModel, 
+                      book_id: UUID = Path(..., description="The book id, you want to update: ")):
     """Update by ID
 
     Args:
-        book_id (int): ID of book to update
-        data (BookCreateModel): data to update book
+        book_id (UUID): ID of book to update
+        data (BookUpdateModel): the fields to change, the others are left as they are
 
     Returns:
         dict: the updated book
     """
-    book = await book_services.update(
-        db, 
-        book_id, 
-        data={
-            "title": data.title, 
-            "author_id": data.author_id, 
-            "description": data.description, 
-            "rating": data.rating
-        }
-    )
+    book = await book_services.update(db, book_id, data.model_dump(exclude_unset=True))
     return book
 
 @routers.delete("/{book_id}", status_code=HTTPStatus.NO_CONTENT)
-async def delete_book(db: AsyncDbSession, book_id: int = Path(..., description="The book id, you want to delete: ")) -> None:
+async def delete_book(db: AsyncDbSession, book_id: UUID = Path(..., description="The book id, you want to delete: ")) -> None:
     """Delete book by id
 
     Args:
-        book_id (str): ID of book to delete
+        book_id (UUID): ID of book to delete
     """
-    book = await book_services.get_by_id(db, book_id)
-    result = await book_services.delete(db, book)
-    return result
+    await book_services.delete(db, book_id)
 
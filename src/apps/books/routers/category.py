@@ -1,12 +1,16 @@
 from http import HTTPStatus
-from fastapi import APIRouter, Depends, HTTPException, Path
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from typing import List, Optional
 from uuid import UUID
 
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.filters import PopularityFilter
+from src.api.dependencies.pagination import Pagination
 from src.apps.books.models.category import BookCategory
-from src.apps.books.schemas.category import CategoryRead, CategoryCreate, CategoryUpdate
+from src.apps.books.schemas.book import BookModel
+from src.apps.books.schemas.category import CategoryModel, CategoryRead, CategoryCreate, CategoryUpdate
 from src.apps.books.crud import CategoryCRUD
+from src.utilities.pagination import Page
 
 routers = APIRouter()
 services = CategoryCRUD()
@@ -32,12 +36,32 @@ async def create(data: CategoryCreate, db: AsyncDbSession):
     return await services.add(db, new_category)
 
 
+@routers.get("/", response_model=Page[CategoryModel])
+async def get_all(db: AsyncDbSession, page: Pagination, filters: PopularityFilter):
+    """API endpoint for listing category resources, one keyset page at a time
+
+    `min_books`/`max_books` and `sort=-book_count` use the denormalized
+    book_count (books directly in the category), no books are counted.
+    """
+    return await services.get_all(db, page, filters)
+
+
 @routers.get("/tree", response_model=List[CategoryRead])
-async def get_category_tree(db: AsyncDbSession):
-    """API endpoint for listing all category hierarchy
+async def get_category_tree(db: AsyncDbSession,
+    root_id: Optional[UUID] = Query(None, description="Only return the subtree under this category"),
+    max_depth: Optional[int] = Query(None, description="Maximum depth below the root(s)", ge=0),
+):
+    """API endpoint for listing the category hierarchy
+
+    Args:
+        root_id (UUID): optional category to use as the root of the tree
+        max_depth (int): optional depth limit, the roots are at depth 0
+
+    Returns:
+        list: The nested categories with their books
     """
-    categories = await services.get_all_tree(db)
-    return [CategoryRead.model_validate(cat) for cat in categories]
+    content = await services.get_tree_json(db, root_id, max_depth)
+    return Response(content=content, media_type="application/json")
 
 
 @routers.get("/{category_id}", response_model=CategoryRead)
@@ -56,30 +80,36 @@ async def get_category_by_id(category_id: UUID, db: AsyncDbSession):
     return CategoryRead.from_orm(category)
 
 
-@routers.get("/{category_id}/books")
-async def get_books_by_id(db: AsyncDbSession, 
-    category_id: int = Path(..., description="The category id, you want to find: ", gt=0),
-    # query_param: str = Query(None, max_length=5)
+@routers.get("/{category_id}/books", response_model=Page[BookModel])
+async def get_books_by_id(db: AsyncDbSession, page: Pagination,
+    category_id: UUID = Path(..., description="The category id, you want to find: "),
+    recursive: bool = Query(False, description="Include the books of all descendant categories"),
+    max_depth: Optional[int] = Query(None, description="With recursive, how many levels below the category to include", ge=0),
 ):
-    """API endpoint for retrieving a category by its ID
+    """API endpoint for retrieving the books of a category
 
     Args:
-        category_id (int): the ID of the category to retrieve
+        category_id (UUID): the ID of the category
+        recursive (bool): also return books of the whole subtree
+        max_depth (int): optional depth limit of the subtree
 
     Returns:
-        dict: The retrieved roles
+        dict: A page of the retrieved books
     """
-    roles = await services.get_books_by_id(db, category_id)
-    return roles
+    books = await services.get_books_by_id(db, category_id, page, recursive, max_depth)
+    return Page[BookModel](
+        items=[BookModel.model_validate(b) for b in books.items],
+        next_cursor=books.next_cursor
+    )
 
 
-@routers.put("/{category_id}", response_model=CategoryRead)
+@routers.patch("/{category_id}", response_model=CategoryModel)
 async def update(category_id: UUID, data: CategoryUpdate, db: AsyncDbSession):
     """Update by ID
 
     Args:
         category_id (int): ID of category to update
-        data (AuthorCreateModel): data to update category
+        data (CategoryUpdate): the fields to change, the others are left as they are
 
     Returns:
         dict: the updated category
@@ -88,7 +118,7 @@ async def update(category_id: UUID, data: CategoryUpdate, db: AsyncDbSession):
     return updated
 
 
-@routers.delete("/{category_id}", response_model=CategoryRead)
+@routers.delete("/{category_id}", response_model=CategoryModel)
 async def delete(category_id: UUID, db: AsyncDbSession):
     """Delete category by id
 
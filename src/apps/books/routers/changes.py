@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from src.api.dependencies.database import AsyncDbSession
+from src.apps.books.schemas.change import ChangeFeed
+from src.apps.books.crud import ChangeCRUD
+from src.apps.books.services.change_stream import change_hub, cursor_key, stream_changes
+from src.utilities.pagination import DEFAULT_PAGE_SIZE, PageParams
+
+routers = APIRouter()
+services = ChangeCRUD()
+
+
+""" ============================ """
+""" Change feed router endpoints """
+""" ============================ """
+@routers.get("", response_model=ChangeFeed)
+async def get_changes(db: AsyncDbSession,
+    since: Optional[str] = Query(None, description="next_cursor of the previous call; omit to start from the beginning"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description="Maximum number of changes to return"),
+):
+    """API endpoint for syncing the catalog incrementally
+
+    Returns the books, authors, publishers and categories created, updated or
+    deleted after the cursor, oldest first, each with its current content
+    (none for deletes). Keep calling with the returned next_cursor while
+    has_more is true, then poll with it later.
+
+    Args:
+        since (str): opaque cursor returned by the previous call
+        limit (int): page size, capped at MAX_PAGE_SIZE
+
+    Returns:
+        dict: the changes, the cursor to resume from and whether more are waiting
+    """
+    return await services.get_changes(db, PageParams(limit=limit, after=since))
+
+
+@routers.get("/stream", response_class=StreamingResponse)
+async def stream(
+    since: Optional[str] = Query(None, description="Cursor to resume from; omit to receive only new changes"),
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource when it reconnects, same as since"),
+):
+    """API endpoint streaming catalog changes as Server-Sent Events
+
+    Each `changes` event carries a page shaped like the GET /changes response
+    and has the page's next_cursor as its id, so a reconnecting EventSource
+    resumes where it stopped. A `ready` event marks the end of the catch-up.
+    Comment lines are sent every KEEPALIVE_INTERVAL seconds while idle.
+
+    Args:
+        since (str): opaque cursor returned by GET /changes or a previous event id
+        last_event_id (str): Last-Event-ID header, takes precedence over since
+
+    Returns:
+        StreamingResponse: text/event-stream of the changes
+    """
+    cursor = last_event_id or since
+    if cursor is not None:
+        # reject a bad cursor before the stream (and its 200 status) starts
+        cursor_key(cursor)
+    if change_hub.full:
+        raise HTTPException(status_code=503, detail="Too many change stream subscribers, retry later")
+    return StreamingResponse(
+        stream_changes(cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,21 @@
 from http import HTTPStatus
-from fastapi import APIRouter
 from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Query, Response
 
 from src.apps.books.models import BookPublisher
-from src.apps.books.schemas.publisher import PublisherRead, PublisherCreate
+from src.apps.books.schemas.publisher import PublisherRead, PublisherCreate, PublisherUpdate
+from src.apps.books.schemas.bulk import NameIdMapping, NamesBatch
+from src.apps.books.schemas.suggestion import NameSuggestion
+from src.apps.books.services import TYPEAHEAD_TTL
 from src.apps.books.crud.publisher import PublisherCRUD
+from src.utilities.batch import Batch, BatchRequest
+from src.utilities.fieldsets import FieldSet
+from src.utilities.pagination import Page
+from src.api.dependencies.batch import BatchIds
 from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.filters import PopularityFilter
+from src.api.dependencies.pagination import Pagination
 
 routers = APIRouter()
 services = PublisherCRUD()
@@ -30,15 +40,72 @@ async def create(db: AsyncDbSession, data: PublisherCreate):
     return await services.add(db, new_publisher)
 
 
-@routers.get("/", response_model=List[PublisherRead])
-async def get_all(db: AsyncDbSession):
-    """API endpoint for listing all publisher resources
+@routers.get("/", response_model=Page[PublisherRead])
+async def get_all(db: AsyncDbSession, page: Pagination, filters: PopularityFilter, ids: BatchIds):
+    """API endpoint for listing publisher resources, one keyset page at a time
+
+    With `?ids=` those publishers are returned instead of a page, shaped as the
+    POST /batch response.
+
+    `min_books`/`max_books` and `sort=-book_count` use the denormalized
+    book_count, no books are counted.
+    """
+    if ids is not None:
+        publishers = await services.get_many(db, ids)
+        return FieldSet(PublisherRead).respond(publishers, Batch)
+    return await services.get_all(db, page, filters)
+
+
+@routers.post("/batch", response_model=Batch[PublisherRead])
+async def get_batch(db: AsyncDbSession, data: BatchRequest):
+    """API endpoint for fetching many publishers by id at once
+
+    Args:
+        data (BatchRequest): the publisher ids, at most MAX_BATCH_SIZE
+
+    Returns:
+        dict: the publishers found, in the order of the ids, and the ids not found
+    """
+    return await services.get_many(db, data.ids)
+
+
+@routers.post("/bulk", response_model=List[NameIdMapping])
+async def bulk_upsert(db: AsyncDbSession, data: NamesBatch):
+    """API endpoint for resolving many publisher names to ids in one round trip
+
+    Args:
+        data (NamesBatch): the publisher names, missing ones are created
+
+    Returns:
+        list: id, name and whether it was created, one per input name in input order
     """
-    return await services.get_all(db)
+    return await services.bulk_upsert(db, data.names)
+
+
+@routers.get("/typeahead", response_model=List[NameSuggestion])
+async def publisher_typeahead(db: AsyncDbSession,
+    q: str = Query(..., min_length=1, max_length=100, description="What has been typed so far"),
+    limit: int = Query(10, ge=1, le=25, description="Maximum number of suggestions"),
+):
+    """API endpoint for publisher name autocomplete
+
+    Args:
+        q (str): the partial name
+        limit (int): how many suggestions to return
+
+    Returns:
+        list: id and name of the best matching publishers
+    """
+    content = await services.typeahead(db, q, limit)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={TYPEAHEAD_TTL}"}
+    )
 
 
 @routers.get("/{publisher_id}", response_model=PublisherRead)
-async def get_by_id(db: AsyncDbSession, publisher_id: str):
+async def get_by_id(db: AsyncDbSession, publisher_id: UUID):
     """API endpoint for retrieving a publisher by its ID
 
     Args:
@@ -51,27 +118,30 @@ async def get_by_id(db: AsyncDbSession, publisher_id: str):
     return publisher
 
 
-@routers.put("/{publisher_id}", response_model=PublisherRead)
-async def update(db: AsyncDbSession, publisher_id: str, data: PublisherCreate):
-    """Update by ID
+@routers.patch("/{publisher_id}", response_model=PublisherRead)
+async def update(db: AsyncDbSession, publisher_id: UUID, data: PublisherUpdate):
+    """Update by ID, only the given fields
 
     Args:
-        author_id (int): ID of author to update
-        data (AuthorCreateModel): data to update author
+        publisher_id (UUID): ID of publisher to update
+        data (PublisherUpdate): the fields to change, the others are left as they are
 
     Returns:
-        dict: the updated author
+        dict: the updated publisher
     """
-    updated = await services.update(db, data, publisher_id)
+    updated = await services.update(db, publisher_id, data.model_dump(exclude_unset=True))
     return updated
 
 
 @routers.delete("/{publisher_id}", response_model=PublisherRead)
-async def delete(db: AsyncDbSession, publisher_id: str):
-    """Delete author by id
+async def delete(db: AsyncDbSession, publisher_id: UUID):
+    """Delete publisher by id
 
     Args:
-        author_id (str): ID of author to delete
+        publisher_id (UUID): ID of publisher to delete
+
+    Returns:
+        dict: the deleted publisher
     """
     deleted = await services.delete(db, publisher_id)
     return deleted
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional
+from uuid import UUID
+
+from src.api.dependencies.database import AsyncDbSession
+from src.api.dependencies.pagination import Pagination
+from src.apps.books.schemas.stats import AuthorStatsModel, CategoryStatsModel, PublisherStatsModel, YearStatsModel
+from src.apps.books.crud import StatsCRUD
+from src.utilities.pagination import Page
+
+routers = APIRouter()
+services = StatsCRUD()
+
+
+""" =========================== """
+""" Statistics router endpoints """
+""" =========================== """
+@routers.get("/categories", response_model=Page[CategoryStatsModel])
+async def get_category_stats(db: AsyncDbSession, page: Pagination,
+    parent_id: Optional[UUID] = Query(None, description="Only the direct subcategories of this category"),
+):
+    """API endpoint for listing books per category, including subcategories
+
+    Args:
+        parent_id (UUID): optional category whose direct subcategories are listed
+
+    Returns:
+        Page: category stats, most books first
+    """
+    return await services.get_categories(db, page, parent_id)
+
+
+@routers.get("/authors", response_model=Page[AuthorStatsModel])
+async def get_author_stats(db: AsyncDbSession, page: Pagination):
+    """API endpoint for listing the book count and average rating per author
+
+    Returns:
+        Page: author stats, most books first
+    """
+    return await services.get_authors(db, page)
+
+
+@routers.get("/publishers", response_model=Page[PublisherStatsModel])
+async def get_publisher_stats(db: AsyncDbSession, page: Pagination):
+    """API endpoint for listing the book count and average rating per publisher
+
+    Returns:
+        Page: publisher stats, most books first
+    """
+    return await services.get_publishers(db, page)
+
+
+@routers.get("/years", response_model=List[YearStatsModel])
+async def get_year_stats(db: AsyncDbSession,
+    year_from: Optional[int] = Query(None, description="First year (inclusive)"),
+    year_to: Optional[int] = Query(None, description="Last year (inclusive)"),
+):
+    """API endpoint for listing the number of books published per year
+
+    Args:
+        year_from (int): optional first year
+        year_to (int): optional last year
+
+    Returns:
+        list: year stats in year order
+    """
+    return await services.get_years(db, year_from, year_to)
@@ -1,4 +1,8 @@
 from .author import *
 from .book import *
 from .category import *
-from .publisher import *
\ No newline at end of file
+from .publisher import *
+from .suggestion import *
+from .bulk import *
+from .stats import *
+from .change import *
\ No newline at end of file
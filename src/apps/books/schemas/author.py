@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -5,6 +6,7 @@ from pydantic import BaseModel, Field, ConfigDict
 class AuthorModel(BaseModel):
     id: UUID
     name: str = Field(min_length=3, max_length=100)
+    book_count: int = 0
     # email : EmailStr = Field(min_length=5, max_length=100)
     # birth_date: date
     
@@ -14,6 +16,11 @@ class AuthorModel(BaseModel):
     )
 
 
+class AuthorUpdateModel(BaseModel):
+    # PATCH: only the fields sent are written
+    name: Optional[str] = Field(None, min_length=3, max_length=100)
+
+
 #schema for creating a note
 class AuthorCreateModel(BaseModel):
     name : str
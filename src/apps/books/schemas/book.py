@@ -1,11 +1,20 @@
 from datetime import date
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from pydantic import BaseModel
 
+from .author import AuthorModel
+from .category import CategoryModel
+from .publisher import PublisherRead
+from src.utilities.pagination import Page
+
+
+# related objects that can be side-loaded with ?include=
+BOOK_INCLUDES = ("author", "publisher", "category")
+
 
 class BookBase(BaseModel):
     title: str
@@ -39,6 +48,43 @@ class BookModel(BaseModel):
         from_attributes= True
     )
 
+class BookIncluded(BaseModel):
+    authors: Optional[List[AuthorModel]] = None
+    publishers: Optional[List[PublisherRead]] = None
+    categories: Optional[List[CategoryModel]] = None
+
+
+class FacetCount(BaseModel):
+    # category/publisher id, or the first year of a decade / lowest rating of a bucket
+    value: Union[UUID, int, None]
+    count: int
+
+
+class BookFacets(BaseModel):
+    category: List[FacetCount] = []
+    publisher: List[FacetCount] = []
+    decade: List[FacetCount] = []
+    rating: List[FacetCount] = []
+
+
+class BookPage(Page[BookModel]):
+    included: Optional[BookIncluded] = None
+    facets: Optional[BookFacets] = None
+
+
+class BookDocument(BookModel):
+    included: Optional[BookIncluded] = None
+
+
+class BookSearchResult(BookModel):
+    rank: float
+    snippet: Optional[str] = None
+
+
+class BookSearchPage(Page[BookSearchResult]):
+    facets: Optional[BookFacets] = None
+
+
 #schema for creating a note
 class BookCreateModel(BaseModel):
     title : str
@@ -62,4 +108,35 @@ class BookCreateModel(BaseModel):
                 "rating": "100"               
             }
         }
-    )
\ No newline at end of file
+    )
+
+
+class BookUpdateModel(BaseModel):
+    # PATCH: only the fields sent are written
+    title: Optional[str] = None
+    category_id: Optional[UUID] = None
+    author_id: Optional[UUID] = None
+    publisher_id: Optional[UUID] = None
+    published_at: Optional[date] = None
+    description: Optional[str] = None
+    rating: Optional[int] = Field(None, gt=-1, lt=101)
+
+    @model_validator(mode="after")
+    def reject_nulls(self):
+        # None only means "not sent": BookModel requires every one of these fields
+        nulls = sorted(name for name in self.model_fields_set if getattr(self, name) is None)
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+
+class BookImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class BookImportReport(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[BookImportError] = []
@@ -0,0 +1,28 @@
+from typing import Annotated, List
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+
+
+MAX_NAMES_BATCH = 5000
+
+NameStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class NamesBatch(BaseModel):
+    names: List[NameStr] = Field(min_length=1, max_length=MAX_NAMES_BATCH)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example":{
+                "names": ["sample name", "another name"],
+            }
+        }
+    )
+
+
+class NameIdMapping(BaseModel):
+    id: UUID
+    name: str
+    created: bool
+
+    model_config = ConfigDict(from_attributes=True)
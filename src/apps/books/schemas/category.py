@@ -22,8 +22,17 @@ class CategoryCreate(BaseModel):
     )
 
 
-class CategoryUpdate(CategoryBase):
-    pass
+class CategoryUpdate(BaseModel):
+    # PATCH: only the fields sent are written, an explicit null parent_id makes it a root
+    name: Optional[str] = None
+    parent_id: Optional[UUID] = None
+
+
+class CategoryModel(CategoryBase):
+    id: UUID
+    book_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
 
 # class CategoryTree(CategoryBase):
 #     children: List['CategoryTree'] = []
@@ -0,0 +1,26 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class ChangeOp(StrEnum):
+    upsert = "upsert"
+    delete = "delete"
+
+
+class ChangeModel(BaseModel):
+    resource: str
+    id: UUID
+    op: ChangeOp
+    changed_at: datetime
+    # the current row for upserts, None for deletes (tombstones)
+    data: Optional[Dict[str, Any]] = None
+
+
+class ChangeFeed(BaseModel):
+    items: List[ChangeModel]
+    # always set: pass it back as ?since= to get the changes after this page
+    next_cursor: str
+    has_more: bool = False
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -19,9 +20,15 @@ class PublisherCreate(BaseModel):
         }
     )
 
+class PublisherUpdate(BaseModel):
+    # PATCH: only the fields sent are written
+    name: Optional[str] = Field(None, min_length=3, max_length=100)
+
+
 class PublisherRead(BaseModel):
     id: UUID
     name : str
+    book_count: int = 0
 
     class Config:
         orm_mode = True
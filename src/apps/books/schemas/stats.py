@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
+
+
+class CategoryStatsModel(BaseModel):
+    category_id: UUID
+    name: str
+    parent_id: Optional[UUID] = None
+    book_count: int
+    subtree_book_count: int
+    refreshed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AuthorStatsModel(BaseModel):
+    author_id: UUID
+    name: str
+    book_count: int
+    average_rating: Optional[float] = None
+    refreshed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PublisherStatsModel(BaseModel):
+    publisher_id: UUID
+    name: str
+    book_count: int
+    average_rating: Optional[float] = None
+    refreshed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class YearStatsModel(BaseModel):
+    year: int
+    book_count: int
+    refreshed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,9 @@
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
+
+
+class NameSuggestion(BaseModel):
+    id: UUID
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
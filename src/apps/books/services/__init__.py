@@ -0,0 +1,7 @@
+from .category_tree_cache import CategoryTreeCache, category_tree_cache
+from .typeahead import TYPEAHEAD_TTL, name_typeahead, typeahead_cache
+from .catalog_format import CATALOG_MEDIA_TYPES, CatalogFormat, ParsedRecord, decode_import, encode_export
+from .name_upsert import upsert_names
+from .facets import FACETS_TTL, book_facets, facet_cache
+from .catalog_stats import CatalogStatsRefresher, catalog_stats
+from .book_counters import BookCounts, repair_book_counts
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import Integer, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import AsyncSessionLocal
+from src.apps.books.models.author import Author
+from src.apps.books.models.book import Book
+from src.apps.books.models.category import BookCategory
+from src.apps.books.models.publisher import BookPublisher
+from src.utilities.sql import any_of
+
+
+# model holding a book_count -> the foreign key of Book pointing at it
+COUNTED_BY = {
+    Author: Book.author_id,
+    BookPublisher: Book.publisher_id,
+    BookCategory: Book.category_id,
+}
+
+
+class BookCounts:
+    """Pending changes to the book_count columns of authors, publishers and categories
+
+    Collect +1/-1 per book written, then apply() them in the transaction of the
+    write, before its commit, so the counters are committed (or rolled back)
+    together with the books. One UPDATE per table, whatever the number of books.
+
+    The rows are first locked in a fixed order (table by table, by id), so
+    concurrent writers sharing authors, publishers or categories wait for each
+    other instead of deadlocking. FOR NO KEY UPDATE is the lock the UPDATE takes
+    anyway; unlike FOR UPDATE it does not conflict with the key-share locks the
+    writers' own book inserts hold on the same rows.
+    """
+    def __init__(self):
+        self.deltas: Dict[type, Counter] = {model: Counter() for model in COUNTED_BY}
+
+    def add(self, book, delta: int = 1) -> "BookCounts":
+        """Count a book (any object with author_id, publisher_id and category_id) delta times"""
+        for model, foreign_key in COUNTED_BY.items():
+            self.deltas[model][getattr(book, foreign_key.key)] += delta
+        return self
+
+    async def apply(self, db: AsyncSession):
+        for model, deltas in self.deltas.items():
+            changed = sorted((key, delta) for key, delta in deltas.items() if key is not None and delta)
+            if not changed:
+                continue
+            await db.execute(
+                select(model.id)
+                .where(any_of(model.id, [key for key, _ in changed]))
+                .order_by(model.id)
+                .with_for_update(key_share=True)
+            )
+            changes = (
+                func.unnest(
+                    bindparam(None, [key for key, _ in changed], type_=ARRAY(UUID(as_uuid=True))),
+                    bindparam(None, [delta for _, delta in changed], type_=ARRAY(Integer)),
+                )
+                .table_valued("id", "delta")
+                .render_derived(name="changes")
+            )
+            await db.execute(
+                update(model)
+                .where(model.id == changes.c.id)
+                .values(book_count=model.book_count + changes.c.delta)
+                # expire the counters of objects already loaded in the session
+                .execution_options(synchronize_session="fetch")
+            )
+        self.deltas = {model: Counter() for model in COUNTED_BY}
+
+
+async def repair_book_counts(db: AsyncSession) -> Dict[str, int]:
+    """Recount the books of every author, publisher and category and fix the counters that drifted
+
+    Meant as a backfill after loading data behind the application's back; returns
+    the number of rows corrected per table.
+    """
+    repaired = {}
+    for model, foreign_key in COUNTED_BY.items():
+        counted = (
+            select(model.id, func.count(Book.id).label("book_count"))
+            .outerjoin(Book, foreign_key == model.id)
+            .group_by(model.id)
+            .subquery("counted")
+        )
+        result = await db.execute(
+            update(model)
+            .where(model.id == counted.c.id, model.book_count != counted.c.book_count)
+            .values(book_count=counted.c.book_count)
+            .execution_options(synchronize_session=False)
+        )
+        repaired[model.__tablename__] = result.rowcount
+    await db.commit()
+
+    logging.info(f"Repaired book counts: {repaired}.")
+    return repaired
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        repaired = await repair_book_counts(db)
+    for table, rows in repaired.items():
+        print(f"{table}: {rows} rows corrected")
+
+
+if __name__ == "__main__":
+    # python -m src.apps.books.services.book_counters
+    asyncio.run(main())
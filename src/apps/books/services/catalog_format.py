@@ -0,0 +1,115 @@
+import codecs
+import csv
+import io
+from enum import StrEnum
+from typing import Any, AsyncIterator, Dict, Sequence, Tuple, Union
+
+import orjson
+from sqlalchemy.engine import Row
+
+
+class CatalogFormat(StrEnum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+CATALOG_MEDIA_TYPES = {
+    CatalogFormat.ndjson: "application/x-ndjson",
+    CatalogFormat.csv: "text/csv",
+}
+
+# (1-based record number, parsed record or the reason it could not be parsed)
+ParsedRecord = Tuple[int, Union[Dict[str, Any], str]]
+
+
+async def encode_ndjson(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """One JSON object per line, one chunk per batch of rows"""
+    async for rows in batches:
+        yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+async def encode_csv(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """CSV with a header line taken from the first batch, one chunk per batch of rows"""
+    header_written = False
+    async for rows in batches:
+        if not rows:
+            continue
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(rows[0]._fields)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def encode_export(batches: AsyncIterator[Sequence[Row]], catalog_format: CatalogFormat) -> AsyncIterator[bytes]:
+    if catalog_format == CatalogFormat.csv:
+        return encode_csv(batches)
+    return encode_ndjson(batches)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 body into lines (newline included) without buffering it"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def decode_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, f"invalid JSON: {str(e)}"
+            continue
+        if not isinstance(record, dict):
+            yield number, "expected a JSON object"
+            continue
+        yield number, record
+
+
+async def decode_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """Parse CSV records, the first one being the header
+
+    Lines are joined while a quoted field is still open (odd number of quotes so
+    far), so values containing newlines survive the streaming split.
+    """
+    header = None
+    number = 0
+    record = ""
+    async for line in iter_lines(chunks):
+        record += line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, dict(zip(header, values))
+    if record.strip():
+        yield number + 1, "unterminated quoted field"
+
+
+def decode_import(chunks: AsyncIterator[bytes], catalog_format: CatalogFormat) -> AsyncIterator[ParsedRecord]:
+    if catalog_format == CatalogFormat.csv:
+        return decode_csv(chunks)
+    return decode_ndjson(chunks)
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+from datetime import date
+from typing import Iterable, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import Integer, and_, bindparam, delete, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import AsyncSessionLocal
+from src.common.mixins import utc_now
+from src.apps.books.models.author import Author
+from src.apps.books.models.book import Book
+from src.apps.books.models.category import BookCategoryClosure
+from src.apps.books.models.publisher import BookPublisher
+from src.apps.books.models.stats import AuthorStats, CategoryStats, PublisherStats, YearStats
+from src.utilities.sql import any_of
+
+
+# writes landing within this many seconds are folded into one refresh
+REFRESH_DELAY = 1.0
+RETRY_DELAY = 5.0
+# serializes refreshes across workers, see CatalogStatsRefresher.refresh
+REFRESH_LOCK_ID = 0x626f6f6b73
+
+
+class CatalogStatsRefresher:
+    """Keeps the book_stats_* tables up to date after book writes
+
+    Writers only mark the authors, publishers, categories and years they touched
+    (mark() is synchronous and cheap). A background task collects the marks for
+    REFRESH_DELAY seconds and then recomputes just those rows from `books` on its
+    own session, with one INSERT ... SELECT ... ON CONFLICT DO UPDATE per table.
+    Rows are recomputed, not incremented, so a repeated refresh or a failed one
+    (its keys are marked again) cannot leave a counter drifting. The marks only
+    live in the worker's memory though: those of a worker killed before its
+    next refresh are lost, and their rows stay stale until the same keys are
+    written again. reconcile() (`python -m src.apps.books.services.catalog_stats`)
+    recomputes every row; run it after a crash or on a schedule.
+    Stats endpoints read these tables only.
+    """
+    def __init__(self):
+        self.authors: Set[UUID] = set()
+        self.publishers: Set[UUID] = set()
+        self.categories: Set[UUID] = set()
+        self.years: Set[int] = set()
+        self._pending = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def mark(
+        self, author_id: Optional[UUID] = None, publisher_id: Optional[UUID] = None,
+        category_id: Optional[UUID] = None, published_at: Optional[date] = None
+    ):
+        """Schedule the stats of these keys for refresh (None values are ignored)"""
+        if author_id is not None:
+            self.authors.add(author_id)
+        if publisher_id is not None:
+            self.publishers.add(publisher_id)
+        if category_id is not None:
+            self.categories.add(category_id)
+        if published_at is not None:
+            self.years.add(published_at.year)
+        self._pending.set()
+
+    def mark_book(self, book):
+        """Schedule the stats a book counts towards, with its current values"""
+        self.mark(book.author_id, book.publisher_id, book.category_id, book.published_at)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.authors or self.publishers or self.categories or self.years)
+
+    async def refresh(self, db: AsyncSession):
+        """Recompute the stats rows of every marked key in one transaction
+
+        Keys are taken before the refresh and put back if it fails. The advisory
+        lock makes concurrent workers refresh one after the other, so each
+        statement sees the books committed by the refresh before it and an older
+        snapshot can never overwrite newer counts.
+        """
+        authors, self.authors = self.authors, set()
+        publishers, self.publishers = self.publishers, set()
+        categories, self.categories = self.categories, set()
+        years, self.years = self.years, set()
+        try:
+            await db.execute(select(func.pg_advisory_xact_lock(REFRESH_LOCK_ID)))
+            if authors:
+                await db.execute(self.__refresh_owner(AuthorStats, AuthorStats.author_id, Author.id, Book.author_id, authors))
+            if publishers:
+                await db.execute(self.__refresh_owner(PublisherStats, PublisherStats.publisher_id, BookPublisher.id, Book.publisher_id, publishers))
+            if categories:
+                await db.execute(self.__refresh_categories(categories))
+            if years:
+                await db.execute(self.__refresh_years(years))
+                await db.execute(delete(YearStats).where(any_of(YearStats.year, years), YearStats.book_count == 0))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            self.authors |= authors
+            self.publishers |= publishers
+            self.categories |= categories
+            self.years |= years
+            raise
+
+        logging.info(
+            f"Refreshed catalog stats of {len(authors)} authors, {len(publishers)} publishers, "
+            f"{len(categories)} categories and {len(years)} years."
+        )
+
+    async def reconcile(self, db: AsyncSession):
+        """Mark every author, publisher, category and year, then refresh them all"""
+        self.authors |= set((await db.execute(select(Author.id))).scalars().all())
+        self.publishers |= set((await db.execute(select(BookPublisher.id))).scalars().all())
+        self.categories |= set((await db.execute(select(BookCategoryClosure.ancestor_id).distinct())).scalars().all())
+        # years with books, plus those with a stats row that may have to go
+        years = select(func.extract("year", Book.published_at).cast(Integer)).where(Book.published_at.is_not(None))
+        self.years |= set((await db.execute(years.union(select(YearStats.year)))).scalars().all())
+        await self.refresh(db)
+
+    @staticmethod
+    def __refresh_owner(stats, stats_key, owner_key, book_key, ids: Iterable[UUID]):
+        """Book count and rating sum of authors or publishers, zero for those without books"""
+        source = (
+            select(
+                owner_key,
+                func.count(Book.id),
+                func.coalesce(func.sum(Book.rating), 0),
+                utc_now(),
+            )
+            .select_from(owner_key.table)
+            .outerjoin(Book, book_key == owner_key)
+            .where(any_of(owner_key, ids))
+            .group_by(owner_key)
+        )
+        statement = insert(stats).from_select(
+            [stats_key, stats.book_count, stats.rating_sum, stats.refreshed_at], source
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[stats_key],
+            set_={
+                "book_count": statement.excluded.book_count,
+                "rating_sum": statement.excluded.rating_sum,
+                "refreshed_at": statement.excluded.refreshed_at,
+            },
+        )
+
+    @staticmethod
+    def __refresh_categories(ids: Iterable[UUID]):
+        """Direct and subtree book counts of the marked categories and all their ancestors"""
+        ancestors = (
+            select(BookCategoryClosure.ancestor_id)
+            .where(any_of(BookCategoryClosure.descendant_id, ids))
+        )
+        source = (
+            select(
+                BookCategoryClosure.ancestor_id,
+                func.count(Book.id).filter(Book.category_id == BookCategoryClosure.ancestor_id),
+                func.count(Book.id),
+                utc_now(),
+            )
+            .select_from(BookCategoryClosure)
+            .outerjoin(Book, Book.category_id == BookCategoryClosure.descendant_id)
+            .where(BookCategoryClosure.ancestor_id.in_(ancestors))
+            .group_by(BookCategoryClosure.ancestor_id)
+        )
+        statement = insert(CategoryStats).from_select(
+            [CategoryStats.category_id, CategoryStats.book_count, CategoryStats.subtree_book_count, CategoryStats.refreshed_at],
+            source,
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[CategoryStats.category_id],
+            set_={
+                "book_count": statement.excluded.book_count,
+                "subtree_book_count": statement.excluded.subtree_book_count,
+                "refreshed_at": statement.excluded.refreshed_at,
+            },
+        )
+
+    @staticmethod
+    def __refresh_years(years: Iterable[int]):
+        """Books published in each marked year, counted with a range on the published_at index"""
+        marked = func.unnest(bindparam("years", list(years), type_=ARRAY(Integer))).table_valued("year").render_derived(name="marked")
+        year = marked.c.year
+        source = (
+            select(year, func.count(Book.id), utc_now())
+            .select_from(marked)
+            .outerjoin(Book, and_(
+                Book.published_at >= func.make_date(year, 1, 1),
+                Book.published_at < func.make_date(year + 1, 1, 1),
+            ))
+            .group_by(year)
+        )
+        statement = insert(YearStats).from_select([YearStats.year, YearStats.book_count, YearStats.refreshed_at], source)
+        return statement.on_conflict_do_update(
+            index_elements=[YearStats.year],
+            set_={
+                "book_count": statement.excluded.book_count,
+                "refreshed_at": statement.excluded.refreshed_at,
+            },
+        )
+
+    async def _run(self):
+        while True:
+            await self._pending.wait()
+            await asyncio.sleep(REFRESH_DELAY)
+            self._pending.clear()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.refresh(db)
+            except Exception as e:
+                logging.error(f"Failed to refresh catalog stats. Error: {str(e)}")
+                await asyncio.sleep(RETRY_DELAY)
+                self._pending.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.dirty:
+            # do not drop the marks of the last writes on shutdown
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.refresh(db)
+            except Exception as e:
+                logging.error(f"Failed to refresh catalog stats on shutdown. Error: {str(e)}")
+
+
+catalog_stats = CatalogStatsRefresher()
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        await catalog_stats.reconcile(db)
+    print("Catalog stats recomputed.")
+
+
+if __name__ == "__main__":
+    # python -m src.apps.books.services.catalog_stats
+    asyncio.run(main())
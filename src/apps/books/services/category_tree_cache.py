@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Dict, Hashable, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from src.core.redis import redis_client
+
+
+CHANNEL = "books:category_tree:invalidate"
+MAX_ENTRIES = 256
+
+
+class CategoryTreeCache:
+    """Per-worker cache of the serialized (JSON bytes) category tree
+
+    Entries are tagged with the tree version they were built from. Any category
+    (or book) write bumps the version and publishes an invalidation on a Redis
+    channel, so every worker drops its copy without polling. Reads are served
+    from memory only while the worker is subscribed to that channel; otherwise
+    it cannot see other workers' writes and the cache is bypassed.
+    """
+    def __init__(self):
+        self.version = 0
+        self.listening = False
+        self._entries: Dict[Hashable, Tuple[int, bytes]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        if not self.listening:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.version:
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, version: int, content: bytes) -> bytes:
+        """Store content built from `version`; it is ignored if the tree changed meanwhile"""
+        if version == self.version:
+            self._entries.pop(key, None)
+            if len(self._entries) >= MAX_ENTRIES:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (version, content)
+        return content
+
+    def bump(self):
+        self.version += 1
+        self._entries.clear()
+
+    async def invalidate(self):
+        """Drop the local copy and tell the other workers to drop theirs"""
+        self.bump()
+        try:
+            await redis_client.publish(CHANNEL, self.version)
+        except RedisError as e:
+            logging.warning(f"Failed to publish category tree invalidation. Error: {str(e)}")
+
+    async def _listen(self):
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                # anything cached before the subscription may have missed a write
+                self.bump()
+                self.listening = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.bump()
+            except RedisError as e:
+                logging.warning(f"Category tree invalidation channel lost. Error: {str(e)}")
+            finally:
+                self.listening = False
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+category_tree_cache = CategoryTreeCache()
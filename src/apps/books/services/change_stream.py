@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, Set, Tuple
+
+import asyncpg
+
+from src.core.database import AsyncSessionLocal, async_engine
+from src.apps.books.crud.changes import ChangeCRUD
+from src.apps.books.models import CatalogChange
+from src.apps.books.schemas.change import ChangeFeed
+from src.utilities.pagination import MAX_PAGE_SIZE, PageParams, decode_cursor
+
+
+CHANNEL = "catalog_changes"
+# pages of changes buffered per subscriber before it is switched to catching up on its own
+SUBSCRIBER_BUFFER = 64
+MAX_SUBSCRIBERS = 5000
+# notifications arriving within this many seconds are folded into one read of the feed
+NOTIFY_DELAY = 0.1
+# re-read the feed after this many seconds while changes are held back by an older open transaction
+PENDING_DELAY = 0.5
+KEEPALIVE_INTERVAL = 15.0
+RECONNECT_DELAY = 1.0
+
+changes = ChangeCRUD()
+
+
+class Subscriber:
+    """One SSE client: a bounded buffer of feed pages, filled by the hub
+
+    When the buffer is full the hub drops it instead of waiting, and the client
+    catches up from its own cursor with the feed queries before going live again.
+    """
+    def __init__(self):
+        self.queue: "asyncio.Queue[Tuple[str, ChangeFeed]]" = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self.overflowed = False
+
+    def push(self, start: str, page: ChangeFeed):
+        """Buffer a page holding the changes after the start cursor"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait((start, page))
+        except asyncio.QueueFull:
+            # the client catches up from its cursor, buffered pages are of no use anymore
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+
+
+class ChangeHub:
+    """Per-worker fan-out of the catalog change feed to SSE subscribers
+
+    The record_catalog_change trigger NOTIFYs on every catalog write. One
+    asyncpg connection per worker LISTENs; a notification only wakes the hub,
+    which then reads the new changes with the same query as /api/v1/changes
+    (one read per burst, whatever the number of subscribers) and pushes them to
+    every subscriber's buffer. Idle subscribers cost nothing but a queue.
+    Reading the log rather than the notification payloads means nothing is
+    lost while the listener reconnects.
+
+    A change committed while an older transaction is still open is not readable
+    yet when its own notification arrives (the feed stops at the horizon), so
+    while there are subscribers and such changes exist the hub reads again
+    every PENDING_DELAY seconds until they are through.
+    """
+    def __init__(self):
+        self.cursor: Optional[str] = None
+        self.subscribers: Set[Subscriber] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks: list = []
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= MAX_SUBSCRIBERS
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def _notified(self, connection, pid, channel, payload):
+        self._wakeup.set()
+
+    async def _listen(self):
+        dsn = async_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(CHANNEL, self._notified)
+                # changes made while not listening are read right away
+                self._wakeup.set()
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await closed.wait()
+                logging.warning("Catalog change listener connection closed.")
+            except (OSError, asyncpg.PostgresError) as e:
+                logging.warning(f"Catalog change listener lost. Error: {str(e)}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _pump(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(NOTIFY_DELAY)
+            self._wakeup.clear()
+            try:
+                async with AsyncSessionLocal() as db:
+                    if self.cursor is None:
+                        self.cursor = await changes.get_cursor(db)
+                    while True:
+                        start = self.cursor
+                        page = await changes.get_changes(db, PageParams(limit=MAX_PAGE_SIZE, after=start))
+                        self.cursor = page.next_cursor
+                        if page.items:
+                            for subscriber in list(self.subscribers):
+                                subscriber.push(start, page)
+                        if not page.has_more:
+                            break
+                    if self.subscribers and await changes.has_pending(db):
+                        asyncio.get_running_loop().call_later(PENDING_DELAY, self._wakeup.set)
+            except Exception as e:
+                logging.error(f"Failed to read catalog changes. Error: {str(e)}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                self._wakeup.set()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._pump())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+change_hub = ChangeHub()
+
+
+def cursor_key(cursor: str) -> Tuple[int, int]:
+    return decode_cursor(cursor, [CatalogChange.txid, CatalogChange.seq])
+
+
+def sse_event(page: ChangeFeed) -> bytes:
+    """One SSE event per page; its id is the cursor to resume after it (Last-Event-ID)"""
+    return f"id: {page.next_cursor}\nevent: changes\ndata: {page.model_dump_json()}\n\n".encode()
+
+
+async def catch_up(cursor: str) -> AsyncIterator[ChangeFeed]:
+    """Pages of the feed after cursor, each read on a short-lived session, until caught up"""
+    while True:
+        async with AsyncSessionLocal() as db:
+            page = await changes.get_changes(db, PageParams(limit=MAX_PAGE_SIZE, after=cursor))
+        cursor = page.next_cursor
+        yield page
+        if not page.has_more:
+            return
+
+
+async def stream_changes(cursor: Optional[str]) -> AsyncIterator[bytes]:
+    """SSE body: the changes after cursor (only new ones without), then live changes as they commit
+
+    The subscription is taken before catching up, so nothing the hub reads in
+    between is lost. Hub pages wholly behind the client's cursor are skipped;
+    one starting after it means the client missed something (it overflowed,
+    or joined before the hub's first read), and it catches up from the feed.
+    Delivery is at least once: an upsert may be repeated, never skipped.
+    """
+    subscriber = change_hub.subscribe()
+    try:
+        if cursor is None:
+            async with AsyncSessionLocal() as db:
+                cursor = await changes.get_cursor(db)
+        async for page in catch_up(cursor):
+            cursor = page.next_cursor
+            if page.items:
+                yield sse_event(page)
+        yield f"id: {cursor}\nevent: ready\ndata: {{}}\n\n".encode()
+
+        while True:
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                async for page in catch_up(cursor):
+                    cursor = page.next_cursor
+                    if page.items:
+                        yield sse_event(page)
+            try:
+                start, page = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if cursor_key(page.next_cursor) <= cursor_key(cursor):
+                continue
+            if cursor_key(start) > cursor_key(cursor):
+                subscriber.overflowed = True
+                continue
+            cursor = page.next_cursor
+            yield sse_event(page)
+    finally:
+        change_hub.unsubscribe(subscriber)
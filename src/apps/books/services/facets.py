@@ -0,0 +1,61 @@
+import logging
+from typing import Hashable
+
+from sqlalchemy import Integer, Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.books.schemas.book import BookFacets, FacetCount
+from src.utilities.cache import TTLCache
+
+
+FACETS_TTL = 60
+FILTERED_FACETS_TTL = 15
+FACET_SIZE = 20
+
+# LRU: the unfiltered counts and popular filter combinations stay cached
+facet_cache = TTLCache(maxsize=1024, ttl=FACETS_TTL)
+
+FACETS = ("category", "publisher", "decade", "rating")
+
+
+async def book_facets(db: AsyncSession, scope: Select, key: Hashable, filtered: bool = True) -> BookFacets:
+    """Counts of the books selected by scope per category, publisher, decade and rating bucket
+
+    scope must select the category_id, publisher_id, published_at and rating of
+    the matching books. All four facets are counted in one GROUPING SETS query;
+    each keeps its FACET_SIZE largest buckets. Results are cached under key for
+    FACETS_TTL seconds, or FILTERED_FACETS_TTL when scope is filtered.
+    """
+    facets = facet_cache.get(key)
+    if facets is not None:
+        return facets
+
+    books = scope.subquery("scope")
+    buckets = select(
+        books.c.category_id.label("category"),
+        books.c.publisher_id.label("publisher"),
+        (func.extract("year", books.c.published_at).cast(Integer) // 10 * 10).label("decade"),
+        func.least(books.c.rating // 10 * 10, 90).label("rating"),
+    ).subquery("buckets")
+    columns = [buckets.c[name] for name in FACETS]
+    statement = (
+        select(*columns, func.grouping(*columns).label("grouping"), func.count().label("count"))
+        .group_by(func.grouping_sets(*(tuple_(column) for column in columns)))
+    )
+    result = await db.execute(statement)
+
+    counts = {name: [] for name in FACETS}
+    for row in result.all():
+        # grouping() sets one bit per column left out of the row's grouping set,
+        # the first column being the highest bit
+        for position, name in enumerate(FACETS):
+            if not row.grouping & (1 << (len(FACETS) - 1 - position)):
+                counts[name].append(FacetCount(value=getattr(row, name), count=row.count))
+                break
+    facets = BookFacets(**{
+        name: sorted(values, key=lambda facet: facet.count, reverse=True)[:FACET_SIZE]
+        for name, values in counts.items()
+    })
+
+    logging.info(f"Computed book facets for {key}.")
+    return facet_cache.set(key, facets, FACETS_TTL if not filtered else FILTERED_FACETS_TTL)
@@ -0,0 +1,48 @@
+import logging
+from typing import Iterable, List
+from uuid import uuid4
+
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utilities.sql import any_of
+
+
+async def upsert_names(db: AsyncSession, model, names: Iterable[str]) -> List[Row]:
+    """Create-or-get rows of `model` by unique name in two statements
+
+    An INSERT ... ON CONFLICT (name) DO NOTHING RETURNING creates the missing
+    rows; existing rows are left untouched (no updated_at bump, change-feed
+    entry or notification) and read by a second SELECT. Names are inserted in
+    sorted order, so concurrent batches take their unique index locks in the
+    same order and cannot deadlock. Returns one (id, name, created) row per
+    input name, in input order.
+    """
+    names = list(names)
+    unique_names = sorted(set(names))
+
+    statement = (
+        insert(model)
+        .values([{"id": uuid4(), "name": name} for name in unique_names])
+        .on_conflict_do_nothing(index_elements=[model.name])
+        .returning(model.id, model.name, literal(True).label("created"))
+    )
+    result = await db.execute(statement)
+    rows = {row.name: row for row in result.all()}
+
+    existing = [name for name in unique_names if name not in rows]
+    if existing:
+        # a conflicting insert still in flight was waited for, so its row is visible here
+        result = await db.execute(
+            select(model.id, model.name, literal(False).label("created")).where(any_of(model.name, existing))
+        )
+        rows.update({row.name: row for row in result.all()})
+    await db.commit()
+
+    logging.info(
+        f"Resolved {len(unique_names)} {model.__tablename__} names, "
+        f"{len(unique_names) - len(existing)} created."
+    )
+    return [rows[name] for name in names]
@@ -0,0 +1,48 @@
+import logging
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.apps.books.schemas.suggestion import NameSuggestion
+from src.utilities.cache import TTLCache
+from src.utilities.sql import prefix_pattern
+
+
+TYPEAHEAD_TTL = 30
+MIN_FUZZY_LENGTH = 3
+
+typeahead_cache = TTLCache(maxsize=4096, ttl=TYPEAHEAD_TTL)
+suggestions_adapter = TypeAdapter(List[NameSuggestion])
+
+
+async def name_typeahead(db: AsyncSession, model, q: str, limit: int) -> bytes:
+    """Top `limit` names of `model` matching q, as serialized NameSuggestion JSON
+
+    Prefix matches come first, then trigram (pg_trgm) fuzzy matches, each ordered by
+    similarity. From MIN_FUZZY_LENGTH characters on both predicates are served by
+    the GIN gin_trgm_ops index on name; a shorter q has no full trigram to look up,
+    so its ILIKE prefix reads most of that index or the table and relies on the
+    cache. Results are cached per worker for TYPEAHEAD_TTL seconds.
+    """
+    q = q.strip()
+    key = (model.__tablename__, q.casefold(), limit)
+    content = typeahead_cache.get(key)
+    if content is not None:
+        return content
+
+    prefix = model.name.ilike(prefix_pattern(q), escape="\\")
+    condition = prefix | model.name.op("%")(q) if len(q) >= MIN_FUZZY_LENGTH else prefix
+    statement = (
+        select(model.id, model.name)
+        .where(condition)
+        .order_by(prefix.desc(), func.similarity(model.name, q).desc(), model.name)
+        .limit(limit)
+    )
+    result = await db.execute(statement)
+    rows = result.all()
+
+    logging.info(f"Typeahead on {model.__tablename__} for '{q}' matched {len(rows)} names.")
+    suggestions = suggestions_adapter.validate_python(rows, from_attributes=True)
+    return typeahead_cache.set(key, suggestions_adapter.dump_json(suggestions))
@@ -1,10 +1,21 @@
-from datetime import datetime
-
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, FetchedValue, func
 from sqlalchemy.orm import declarative_mixin
 
 
+def utc_now():
+    """Transaction time as naive UTC, evaluated by the database"""
+    return func.timezone('utc', func.now())
+
+
 @declarative_mixin
 class Timestamp:
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    """created_at / updated_at set by the database
+
+    updated_at is bumped by the touch_updated_at trigger on every UPDATE, so
+    bulk statements and raw SQL keep it right too. Both are read back with
+    RETURNING after each flush (eager_defaults), never lazy loaded.
+    """
+    created_at = Column(DateTime, server_default=utc_now(), nullable=False)
+    updated_at = Column(DateTime, server_default=utc_now(), server_onupdate=FetchedValue(), nullable=False, index=True)
+
+    __mapper_args__ = {"eager_defaults": True}
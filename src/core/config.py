@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +8,31 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_EXPIRE_DAYS: float
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # directory of ES256 `<kid>.pem` signing keys, published at /.well-known/jwks.json;
+    # unset signs with SECRET_KEY/ALGORITHM
+    JWT_KEYS_DIR: Optional[str] = None
+    # switch-over only: also accept tokens signed with SECRET_KEY (no kid) after setting
+    # JWT_KEYS_DIR, until they have expired (REFRESH_EXPIRE_DAYS); not needed while there are no key files
+    JWT_ACCEPT_SECRET_KEY: bool = False
+    # verified access tokens kept per worker, so repeat requests skip signature verification
+    TOKEN_CACHE_SIZE: int = 10000
+    # permission a token must carry to read the per-worker metrics endpoints
+    ADMIN_PERMISSION: str = "admin"
+    # bcrypt cost (log2 of the rounds); stored hashes of another cost are rehashed on login,
+    # pick it with `python -m src.apps.auth.services.passwords --target-ms 250`
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # bcrypt threads per worker process, and how long (seconds) a login waits for one before a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_WAIT: float = 2.0
+    # calls allowed to wait for a bcrypt thread; beyond that they are refused at once
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # bcrypt calls running at once across all worker processes (Redis), at most
+    # PASSWORD_HASH_WORKERS of them in any one process
+    PASSWORD_HASH_GLOBAL_LIMIT: int = 8
+    # failed logins per username within the window (seconds) before the username is locked out
+    LOGIN_MAX_FAILURES: int = 10
+    LOGIN_FAILURE_WINDOW: int = 900
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,78 @@
+import logging
+from typing import Generic, List, Optional, Sequence, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utilities.fieldsets import select_fields
+from src.utilities.sql import any_of
+
+
+MAX_BATCH_SIZE = 100
+
+T = TypeVar("T")
+
+
+class InvalidBatchError(HTTPException):
+    def __init__(self, message: str):
+        super().__init__(status_code=400, detail=message)
+
+
+class Batch(BaseModel, Generic[T]):
+    """Objects fetched by id, in the requested order, and the ids that were not found"""
+    items: List[T]
+    missing: List[UUID] = []
+
+
+class BatchRequest(BaseModel):
+    ids: List[UUID] = Field(min_length=1)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example":{
+                "ids": ["3fa85f64-5717-4562-b3fc-2c963f66afa6"],
+            }
+        }
+    )
+
+
+def batch_ids(
+    ids: Optional[str] = Query(None, description=f"Comma separated ids to fetch at once (at most {MAX_BATCH_SIZE}), instead of a page"),
+) -> Optional[List[UUID]]:
+    """Parse the `?ids=` list of a multi-get"""
+    if ids is None:
+        return None
+    values = [value.strip() for value in ids.split(",") if value.strip()]
+    if not values:
+        raise InvalidBatchError("ids must not be empty")
+    try:
+        return [UUID(value) for value in values]
+    except ValueError:
+        raise InvalidBatchError(f"Invalid id in ids: {ids}")
+
+
+async def get_batch(
+    db: AsyncSession, model, ids: Sequence[UUID], fields: Optional[Sequence[str]] = None, keys: Sequence = ()
+) -> Batch:
+    """Fetch the objects with the given ids in one `id = ANY(:ids)` query
+
+    Items keep the order of ids (repeated ids are returned once); ids without a
+    row are listed in missing. Only the given columns (plus the key columns) are
+    selected when fields is set.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_SIZE:
+        raise InvalidBatchError(f"At most {MAX_BATCH_SIZE} ids can be fetched at once, got {len(ids)}")
+
+    statement = select_fields(model, fields, model.id, *keys).where(any_of(model.id, ids))
+    result = await db.execute(statement)
+    rows = result.all() if fields else result.scalars().all()
+    found = {row.id: row for row in rows}
+
+    logging.info(f"Retrieved {len(found)} of {len(ids)} requested {model.__tablename__}.")
+    return Batch(
+        items=[found[id] for id in ids if id in found],
+        missing=[id for id in ids if id not in found]
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utilities.sql import any_of
+
+
+LOADERS_KEY = "loaders"
+
+
+class DataLoader:
+    """Batches and caches primary key lookups of one model within one session
+
+    Every load() made during the same event-loop tick is answered by a single
+    `WHERE id = ANY(:ids)` query. Results, including misses (None), stay cached
+    for the life of the loader, so the same id is never queried twice. Keys are
+    converted to the primary key's Python type first (e.g. a str to uuid.UUID),
+    so they match the keys of the loaded rows; a key that does not convert is
+    a miss.
+    """
+    def __init__(self, db: AsyncSession, model, lock: asyncio.Lock):
+        self.db = db
+        self.model = model
+        self._lock = lock
+        self._key = inspect(model).primary_key[0]
+        self._key_type = self._key.type.python_type
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[Any]]":
+        """The object with this primary key, or None, once the current batch has run"""
+        loop = asyncio.get_running_loop()
+        try:
+            key = self._normalize(key)
+        except (TypeError, ValueError):
+            future = loop.create_future()
+            future.set_result(None)
+            return future
+        future = self._cache.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._cache[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # let every coroutine that is ready to run queue its keys first
+                loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Optional[Any]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, obj: Any) -> None:
+        """Cache an object already at hand, e.g. one just created"""
+        key = getattr(obj, self._key.key)
+        future = self._cache.get(key)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+        future.set_result(obj)
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        """Forget one cached key, or all of them"""
+        if key is None:
+            self._cache = {key: future for key, future in self._cache.items() if not future.done()}
+            return
+        try:
+            key = self._normalize(key)
+        except (TypeError, ValueError):
+            return
+        if key in self._cache and self._cache[key].done():
+            del self._cache[key]
+
+    def _normalize(self, key: Hashable) -> Hashable:
+        return key if isinstance(key, self._key_type) else self._key_type(key)
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        task = asyncio.create_task(self._load_batch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: List[Hashable]) -> None:
+        try:
+            # an AsyncSession runs one statement at a time, shared by all loaders of the session
+            async with self._lock:
+                result = await self.db.execute(select(self.model).where(any_of(self._key, keys)))
+                found = {getattr(obj, self._key.key): obj for obj in result.scalars().all()}
+        except Exception as e:
+            logging.error(f"Failed to load {len(keys)} {self.model.__name__} objects. Error: {str(e)}")
+            for key in keys:
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logging.info(f"Loaded {len(found)} of {len(keys)} {self.model.__name__} objects in one batch.")
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """One DataLoader per model, created on first use, for one session"""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._lock = asyncio.Lock()
+        self._loaders: Dict[Any, DataLoader] = {}
+
+    def __getitem__(self, model) -> DataLoader:
+        loader = self._loaders.get(model)
+        if loader is None:
+            loader = self._loaders[model] = DataLoader(self.db, model, self._lock)
+        return loader
+
+    def clear(self) -> None:
+        for loader in self._loaders.values():
+            loader.clear()
+
+
+def get_loaders(db: AsyncSession) -> Loaders:
+    """The loaders of a session, kept in session.info
+
+    Sessions are opened per request, so CRUD classes and routers handed the same
+    session share the same loaders and cache for the rest of that request.
+    """
+    loaders = db.info.get(LOADERS_KEY)
+    if loaders is None:
+        loaders = db.info[LOADERS_KEY] = Loaders(db)
+    return loaders
+
+
+def get_loader(db: AsyncSession, model) -> DataLoader:
+    return get_loaders(db)[model]
@@ -0,0 +1,122 @@
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import Select, inspect, select
+
+
+class InvalidFieldsError(HTTPException):
+    def __init__(self, unknown: Sequence[str], allowed: Sequence[str], kind: str = "fields"):
+        message = f"Unknown {kind}: {', '.join(unknown)}. Allowed {kind}: {', '.join(allowed)}"
+        super().__init__(status_code=400, detail=message)
+
+
+def selectable_fields(schema: Type[BaseModel], entity) -> List[str]:
+    """Fields of the response schema that are plain columns of the ORM entity"""
+    columns = inspect(entity).column_attrs.keys()
+    return [name for name in schema.model_fields if name in columns]
+
+
+@lru_cache(maxsize=None)
+def narrowed_model(schema: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    """A copy of `schema` with only the given fields (cached per field set)"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names},
+    )
+
+
+def select_fields(entity, names: Optional[Sequence[str]], *keys) -> Select:
+    """select(entity), or only the named columns (plus the key columns) when names are given
+
+    Key columns are the ones the query itself needs back, e.g. the pagination seek key.
+    """
+    if not names:
+        return select(entity)
+    columns = [getattr(entity, name) for name in names]
+    columns += [key for key in keys if key.key not in names]
+    return select(*columns)
+
+
+class FieldSet:
+    """Sparse fieldset (`?fields=id,title`) requested for a response schema
+
+    names is None when the client did not ask for a subset, in which case the
+    endpoint behaves as if the parameter did not exist.
+    """
+    def __init__(self, schema: Type[BaseModel], names: Optional[Sequence[str]] = None):
+        self.schema = schema
+        self.names = tuple(names) if names else None
+
+    @property
+    def model(self) -> Type[BaseModel]:
+        if self.names is None:
+            return self.schema
+        return narrowed_model(self.schema, self.names)
+
+    def render(self, content: Any, envelope: Optional[Type[BaseModel]] = None, **members: Optional[BaseModel]):
+        """Serialize content with the narrowed model, see respond()
+
+        Without a field set or members the content is returned untouched so the
+        route's response_model applies as usual.
+        """
+        if self.names is None and not any(member is not None for member in members.values()):
+            return content
+        return self.respond(content, envelope, **members)
+
+    def respond(self, content: Any, envelope: Optional[Type[BaseModel]] = None, **members: Optional[BaseModel]) -> Response:
+        """Serialize a single object, or an envelope of them (e.g. Page), with the narrowed model
+
+        envelope is a generic model parametrized here with the narrowed model.
+        Extra top-level members (e.g. side-loaded objects) are added next to the
+        content's own fields.
+        """
+        model = envelope[self.model] if envelope is not None else self.model
+        body = model.model_validate(content, from_attributes=True).model_dump(mode="json")
+        body.update({
+            key: member.model_dump(mode="json", exclude_none=True)
+            for key, member in members.items() if member is not None
+        })
+        return Response(content=orjson.dumps(body), media_type="application/json")
+
+
+def fieldset(schema: Type[BaseModel], entity) -> Callable[..., FieldSet]:
+    """Build the `?fields=` dependency of one resource
+
+    Only the schema fields backed by a column of the entity can be requested;
+    anything else is rejected with a 400 listing the allowed names.
+    """
+    allowed = selectable_fields(schema, entity)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma separated subset of: {', '.join(allowed)}"),
+    ) -> FieldSet:
+        if fields is None:
+            return FieldSet(schema)
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise InvalidFieldsError(unknown, allowed)
+        # keep the schema's field order so equal sets share one narrowed model
+        return FieldSet(schema, [name for name in allowed if name in names])
+
+    return dependency
+
+
+def inclusions(allowed: Sequence[str]) -> Callable[..., Tuple[str, ...]]:
+    """Build the `?include=` dependency of one resource, returning the requested relation names"""
+    def dependency(
+        include: Optional[str] = Query(None, description=f"Comma separated related objects to side-load: {', '.join(allowed)}"),
+    ) -> Tuple[str, ...]:
+        if include is None:
+            return ()
+        names = list(dict.fromkeys(name.strip() for name in include.split(",") if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise InvalidFieldsError(unknown, allowed, kind="includes")
+        return tuple(name for name in allowed if name in names)
+
+    return dependency
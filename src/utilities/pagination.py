@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import Select, and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(HTTPException):
+    def __init__(self, cursor: str = None):
+        message = "Invalid pagination cursor" if cursor is None else f"Invalid pagination cursor: {cursor}"
+        super().__init__(status_code=400, detail=message)
+
+
+class PageParams:
+    """Keyset pagination query parameters (`?limit=&after=`)
+
+    The page size is capped at MAX_PAGE_SIZE whatever the client asks for.
+    """
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description="Maximum number of items to return"),
+        after: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page"),
+    ):
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.after = after
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def _to_json(value: Any):
+    if isinstance(value, (UUID, date, datetime)):
+        return str(value)
+    return value
+
+
+def _from_json(column, value: Any):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is UUID:
+        return UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the seek key of the last row of a page into an opaque cursor"""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> Tuple[Any, ...]:
+    """Decode a cursor back into values typed after the given seek columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return tuple(_from_json(column, value) for column, value in zip(columns, values))
+    except (ValueError, TypeError):
+        raise InvalidCursorError(cursor)
+
+
+def _seek_columns(sort_column, id_column) -> List[Any]:
+    if sort_column is None or sort_column is id_column:
+        return [id_column]
+    return [sort_column, id_column]
+
+
+def _selects_entity(statement: Select) -> bool:
+    descriptions = statement.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+def _nullable(column) -> bool:
+    return bool(getattr(getattr(column, "expression", column), "nullable", False))
+
+
+def _seek_predicate(columns: List[Any], values: Tuple[Any, ...], descending: bool):
+    """Rows strictly after the cursor, in the order of apply_keyset
+
+    A row comparison with NULL is NULL, so for a nullable sort key the rows
+    whose key is NULL are handled apart: they sort last going up (NULLS LAST)
+    and first going down (NULLS FIRST), the order a btree gives both ways.
+    """
+    if len(columns) == 1:
+        return columns[0] < values[0] if descending else columns[0] > values[0]
+    key, bound = tuple_(*columns), tuple_(*values)
+    after = key < bound if descending else key > bound
+    if not _nullable(columns[0]):
+        return after
+    sort_column, id_column = columns
+    sort_value, id_value = values
+    if sort_value is None:
+        # the cursor is among the NULLs: the rest of them, then (going down) every non-NULL key
+        rest = and_(sort_column.is_(None), id_column < id_value if descending else id_column > id_value)
+        return or_(rest, sort_column.is_not(None)) if descending else rest
+    # going up the NULLs still follow; going down they were already passed
+    return after if descending else or_(after, sort_column.is_(None))
+
+
+def apply_keyset(statement: Select, page: PageParams, sort_column, id_column, descending: bool = False) -> Select:
+    """Add the `(sort_key, id) > cursor` seek predicate, ordering and limit to a statement
+
+    With descending set both keys are walked downwards, `(sort_key, id) < cursor`.
+    Rows with a NULL sort key come last going up and first going down.
+    One extra row is fetched so the caller can tell whether another page exists.
+    """
+    columns = _seek_columns(sort_column, id_column)
+    if page.after:
+        values = decode_cursor(page.after, columns)
+        statement = statement.where(_seek_predicate(columns, values, descending))
+    ordering = [column.desc() for column in columns] if descending else columns
+    return statement.order_by(*ordering).limit(page.limit + 1)
+
+
+def next_page(rows: Sequence[Any], page: PageParams, sort_column, id_column) -> Tuple[List[Any], Optional[str]]:
+    """Trim the look-ahead row and build the cursor of the following page"""
+    rows = list(rows)
+    if len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    last = rows[-1]
+    columns = _seek_columns(sort_column, id_column)
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
+
+
+async def paginate(
+    db: AsyncSession, statement: Select, page: PageParams, sort_column, id_column, descending: bool = False
+) -> Page:
+    """Run a keyset paginated query and return one page
+
+    Items are ORM objects when the statement selects a single entity, rows otherwise.
+    """
+    result = await db.execute(apply_keyset(statement, page, sort_column, id_column, descending))
+    rows = result.scalars().all() if _selects_entity(statement) else result.all()
+    items, next_cursor = next_page(rows, page, sort_column, id_column)
+    return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+def any_of(column, values: Iterable):
+    """`column = ANY(:values)`, binding the whole list as a single array parameter
+
+    Unlike IN (...) the statement text does not change with the number of values,
+    so asyncpg reuses one prepared statement for any batch size.
+    """
+    return column == any_(bindparam(None, list(values), type_=ARRAY(column.type)))
+
+
+def prefix_pattern(value: str) -> str:
+    """LIKE pattern matching strings that start with value (use with escape="\\")
+
+    The pattern is a bind parameter: once asyncpg's prepared statement switches
+    to a generic plan the planner no longer knows the prefix and cannot turn it
+    into an index range, use starts_with() where a btree should serve it.
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def starts_with(column, value: str):
+    """`column ~>=~ :value AND column ~<~ :upper`, the strings that start with value
+
+    Unlike LIKE 'value%' this is a range of the text_pattern_ops btree operators
+    with both bounds as parameters, so a text_pattern_ops index on column serves
+    it in generic prepared plans too. Comparison is by code point, which for the
+    prefix test gives the same rows as LIKE.
+    """
+    clause = column.op("~>=~", is_comparison=True)(value)
+    upper = prefix_upper_bound(value)
+    if upper is not None:
+        clause = and_(clause, column.op("~<~", is_comparison=True)(upper))
+    return clause
+
+
+def prefix_upper_bound(value: str) -> Optional[str]:
+    """The smallest string greater than every string starting with value, None when there is none"""
+    value = value.rstrip(chr(0x10FFFF))
+    if not value:
+        return None
+    last = ord(value[-1]) + 1
+    if 0xD800 <= last <= 0xDFFF:
+        # surrogates cannot be encoded, the next character is the first after them
+        last = 0xE000
+    return value[:-1] + chr(last)
@@ -0,0 +1,39 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, inspect, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def update_by_id(db: AsyncSession, model, object_id: Any, values: Dict[str, Any]) -> Optional[Any]:
+    """`UPDATE ... WHERE id = :id RETURNING *` in one round trip, the updated object or None when not found
+
+    Only the given values are written (PATCH semantics). The returned row also
+    refreshes the object if the session already holds it, so no refresh() is
+    needed after the commit. With nothing to write the row is only read.
+    """
+    key = inspect(model).primary_key[0]
+    if not values:
+        result = await db.execute(select(model).where(key == object_id))
+        return result.scalars().one_or_none()
+    statement = (
+        update(model)
+        .where(key == object_id)
+        .values(**values)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(statement)
+    return result.scalars().one_or_none()
+
+
+async def delete_by_id(db: AsyncSession, model, object_id: Any, *columns) -> Optional[Row]:
+    """`DELETE ... WHERE id = :id RETURNING id` in one round trip, the deleted row or None when not found
+
+    Extra columns are returned too, e.g. what the caller needs to respond with
+    or to adjust derived data, since the row cannot be read after the delete.
+    """
+    key = inspect(model).primary_key[0]
+    statement = delete(model).where(key == object_id).returning(key, *columns)
+    result = await db.execute(statement)
+    return result.one_or_none()